@@ -1,9 +1,29 @@
 	import os
 import sys
 import json
+import time
+import random
+import hashlib
+import argparse
+import threading
 import openai
+from collections import OrderedDict, deque
+from itertools import islice
 from pathlib import Path
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print('numpy is required. Install with "pip install numpy"')
+    sys.exit(1)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 
 try:
     from PyPDF2 import PdfReader
@@ -17,51 +37,520 @@ if not openai.api_key:
     print('Error: OPENAI_API_KEY environment variable not set.')
     sys.exit(1)
 
-MAX_TOKENS = 500  # Rough token limit per chunk for context
+MAX_TOKENS = 500  # Token limit per chunk for context
+CHUNK_OVERLAP = 50  # Tokens repeated from the previous chunk
+PAGES_PER_TASK = 8  # Pages extracted per process-pool task
 MODEL = 'gpt-3.5-turbo'
+EMBEDDING_MODEL = 'text-embedding-ada-002'
+INDEX_DIR = Path(os.getenv('CHATPDF_INDEX_DIR', '.chatpdf_index'))
+SEARCH_BLOCK_ROWS = 8192  # Rows scored per block when building IVF lists
+EMBED_BATCH_TOKENS = 8000  # Token budget per embeddings request
+EMBED_BATCH_SIZE = 256  # Max inputs per embeddings request
+EMBED_CONCURRENCY = int(os.getenv('CHATPDF_EMBED_CONCURRENCY', '4'))
+EMBED_MAX_RETRIES = 6
+ANSWER_CACHE_SIZE = 1024  # Cached answers kept per document
+ANSWER_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached answer expires
 
-def read_pdf(pdf_path: str) -> str:
-    """Extract raw text from a PDF file."""
-    reader = PdfReader(pdf_path)
-    text_parts = []
-    for page in reader.pages:
+_WORKER_READER = None
+
+def _init_pdf_worker(pdf_path: str) -> None:
+    """Open the PDF once per extraction worker process."""
+    global _WORKER_READER
+    _WORKER_READER = PdfReader(pdf_path)
+
+def _extract_page_range(start: int, end: int) -> List[str]:
+    """Extract text for pages [start, end) in a worker process."""
+    texts = []
+    for page_number in range(start, end):
         try:
-            text_parts.append(page.extract_text() or "")
+            texts.append(_WORKER_READER.pages[page_number].extract_text() or "")
         except Exception:
-            continue
-    return "\n".join(text_parts)
+            texts.append("")
+    return texts
 
-def chunk_text(text: str, max_tokens: int = MAX_TOKENS) -> List[str]:
-    """Split text into roughly max_tokens sized chunks.
-    This simplistic splitter uses paragraph boundaries.
+def iter_pages(pdf_path: str, workers: Optional[int] = None, pages_per_task: int = PAGES_PER_TASK) -> Iterator[str]:
+    """Yield page texts in order, extracting page ranges in a process pool.
+
+    At most ``2 * workers`` ranges are in flight, so memory stays bounded and a
+    slow page only delays output while the other workers keep going.
+    """
+    num_pages = len(PdfReader(pdf_path).pages)
+    workers = workers or os.cpu_count() or 1
+    ranges = iter([(start, min(start + pages_per_task, num_pages))
+                   for start in range(0, num_pages, pages_per_task)])
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker, initargs=(pdf_path,)) as pool:
+        in_flight = deque(pool.submit(_extract_page_range, *r) for r in islice(ranges, 2 * workers))
+        while in_flight:
+            texts = in_flight.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                in_flight.append(pool.submit(_extract_page_range, *next_range))
+            yield from texts
+
+def read_pdf(pdf_path: str) -> str:
+    """Extract raw text from a PDF file."""
+    return "\n".join(iter_pages(pdf_path))
+
+class TokenCounter:
+    """Token counting for chunking.
+
+    Uses tiktoken's encoding for the embedding model when it is installed and
+    loadable, and falls back to the words/0.75 estimate otherwise.
     """
-    # Approximate tokens by word count / 0.75 (average English word ~0.75 token)
-    words_per_chunk = int(max_tokens * 0.75)
-    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-    chunks = []
-    current = []
-    current_len = 0
-    for para in paragraphs:
-        para_len = len(para.split())
-        if current_len + para_len > words_per_chunk and current:
-            chunks.append('\n\n'.join(current))
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except Exception:
+                # The encoding file is downloaded on first use; stay usable offline
+                self.encoding = None
+        self.name = self.encoding.name if self.encoding is not None else 'words'
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return estimate_tokens(text)
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """Cut text into pieces of at most max_tokens tokens."""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return [self.encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+        words = text.split()
+        step = max(1, int(max_tokens * 0.75))
+        return [' '.join(words[i:i + step]) for i in range(0, len(words), step)]
+
+    def tail(self, text: str, n_tokens: int) -> str:
+        """Return roughly the last n_tokens tokens of text."""
+        if n_tokens <= 0:
+            return ''
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text, disallowed_special=())[-n_tokens:])
+        return ' '.join(text.split()[-max(1, int(n_tokens * 0.75)):])
+
+def iter_chunks(pages: Iterable[str], max_tokens: int = MAX_TOKENS, overlap: int = CHUNK_OVERLAP,
+                counter: Optional[TokenCounter] = None) -> Iterator[str]:
+    """Incrementally chunk a stream of page texts on paragraph boundaries.
+
+    Each chunk holds at most ``max_tokens`` tokens and starts with the last
+    ``overlap`` tokens of the previous chunk. Oversized paragraphs are split.
+    """
+    counter = counter or TokenCounter()
+    overlap = min(overlap, max_tokens // 2)
+    current: List[str] = []
+    current_tokens = 0
+    has_new = False
+    for page in pages:
+        for para in page.split('\n\n'):
+            para = para.strip()
+            if not para:
+                continue
+            para_tokens = counter.count(para)
+            pieces = [para] if para_tokens <= max_tokens - overlap else counter.split(para, max_tokens - overlap)
+            for piece in pieces:
+                piece_tokens = para_tokens if len(pieces) == 1 else counter.count(piece)
+                if has_new and current_tokens + piece_tokens > max_tokens:
+                    chunk = '\n\n'.join(current)
+                    yield chunk
+                    tail = counter.tail(chunk, overlap)
+                    current = [tail] if tail else []
+                    current_tokens = counter.count(tail) if tail else 0
+                current.append(piece)
+                current_tokens += piece_tokens
+                has_new = True
+    if has_new:
+        yield '\n\n'.join(current)
+
+def chunk_text(text: str, max_tokens: int = MAX_TOKENS) -> List[str]:
+    """Split text into chunks of at most max_tokens tokens on paragraph boundaries."""
+    return list(iter_chunks([text], max_tokens))
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count using the same words/0.75 ratio as ``chunk_text``."""
+    return int(len(text.split()) / 0.75) + 1
+
+def make_batches(texts: Sequence[str], max_tokens: int = EMBED_BATCH_TOKENS,
+                 max_items: int = EMBED_BATCH_SIZE) -> List[List[int]]:
+    """Greedily pack text positions into batches within a token budget."""
+    batches = []
+    current: List[int] = []
+    current_tokens = 0
+    for pos, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
             current = []
-            current_len = 0
-        current.append(para)
-        current_len += para_len
+            current_tokens = 0
+        current.append(pos)
+        current_tokens += tokens
     if current:
-        chunks.append('\n\n'.join(current))
-    return chunks
+        batches.append(current)
+    return batches
+
+class RateLimitGate:
+    """Shared cooldown so every worker backs off when one hits a rate limit."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self) -> None:
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def trip(self, delay: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+class EmbeddingPipeline:
+    """Batched, concurrent embedding client.
+
+    Texts are packed into requests of up to ``max_tokens`` estimated tokens,
+    ``concurrency`` requests are kept in flight on a thread pool, and
+    rate-limit or transient API errors are retried with jittered exponential
+    backoff (honouring ``Retry-After`` when the API sends it). Output order
+    always matches input order.
+    """
+
+    RETRYABLE = (
+        openai.error.RateLimitError,
+        openai.error.APIError,
+        openai.error.Timeout,
+        openai.error.ServiceUnavailableError,
+        openai.error.APIConnectionError,
+    )
+
+    def __init__(self, model: str = EMBEDDING_MODEL, concurrency: int = EMBED_CONCURRENCY,
+                 max_tokens: int = EMBED_BATCH_TOKENS, max_items: int = EMBED_BATCH_SIZE,
+                 max_retries: int = EMBED_MAX_RETRIES, backoff: float = 1.0):
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.gate = RateLimitGate()
+        self._stats_lock = threading.Lock()
+        self.stats = {'chunks': 0, 'requests': 0, 'retries': 0, 'seconds': 0.0}
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            self.gate.wait()
+            try:
+                resp = openai.Embedding.create(model=self.model, input=texts)
+                with self._stats_lock:
+                    self.stats['requests'] += 1
+                data = sorted(resp['data'], key=lambda item: item['index'])
+                return [item['embedding'] for item in data]
+            except self.RETRYABLE as e:
+                if attempt == self.max_retries:
+                    raise
+                with self._stats_lock:
+                    self.stats['retries'] += 1
+                delay = min(60.0, self.backoff * 2 ** attempt) * (0.5 + random.random())
+                retry_after = (getattr(e, 'headers', None) or {}).get('retry-after')
+                if retry_after:
+                    try:
+                        delay = max(delay, float(retry_after))
+                    except ValueError:
+                        pass
+                if isinstance(e, openai.error.RateLimitError):
+                    self.gate.trip(delay)
+                else:
+                    time.sleep(delay)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed ``texts`` and return their vectors in input order."""
+        start = time.perf_counter()
+        batches = make_batches(texts, self.max_tokens, self.max_items)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = pool.map(lambda batch: self._request([texts[pos] for pos in batch]), batches)
+            for batch, batch_vectors in zip(batches, results):
+                for pos, vec in zip(batch, batch_vectors):
+                    vectors[pos] = vec
+        self.stats['chunks'] += len(texts)
+        self.stats['seconds'] += time.perf_counter() - start
+        return vectors
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.stats['chunks'] / self.stats['seconds'] if self.stats['seconds'] else 0.0
+
+def stub_embedding(text: str, dim: int = 8) -> List[float]:
+    """Deterministic fake embedding of a text, as served by the stub endpoint."""
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    return [digest[i] / 255.0 for i in range(dim)]
+
+class _StubEmbeddingHandler(BaseHTTPRequestHandler):
+    """Minimal /embeddings endpoint for tests and benchmarks.
+
+    Items come back in reverse order (clients must sort by ``index``). The
+    status codes queued in ``failures`` are answered first, one per
+    request, and the size of every successful batch is recorded.
+    """
+
+    delay = 0.0
+    dim = 8
+    failures: deque = deque()
+    batch_sizes: List[int] = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        time.sleep(self.delay)
+        with self.lock:
+            status = self.failures.popleft() if self.failures else 200
+            inputs = body.get('input', [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            if status == 200:
+                self.batch_sizes.append(len(inputs))
+        if status != 200:
+            payload = {'error': {'message': f'stub error {status}', 'type': 'stub_error'}}
+        else:
+            data = [{'object': 'embedding', 'index': i, 'embedding': stub_embedding(text, self.dim)}
+                    for i, text in enumerate(inputs)]
+            payload = {'object': 'list', 'data': data[::-1], 'model': body.get('model'),
+                       'usage': {'prompt_tokens': 0, 'total_tokens': 0}}
+        encoded = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port: int = 0, delay: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub embeddings endpoint on a background thread; port 0 picks a free one.
+    Point the client at it with --api-base http://127.0.0.1:PORT/v1.
+    """
+    _StubEmbeddingHandler.delay = delay
+    server = ThreadingHTTPServer(('127.0.0.1', port), _StubEmbeddingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
 
 def embed_chunks(chunks: List[str]) -> List[Tuple[str, List[float]]]:
     """Create embeddings for each chunk using OpenAI embeddings API.
     Returns list of (chunk_text, embedding_vector).
     """
-    embeddings = []
-    for chunk in chunks:
-        resp = openai.Embedding.create(model='text-embedding-ada-002', input=chunk)
-        embeddings.append((chunk, resp['data'][0]['embedding']))
-    return embeddings
+    return list(zip(chunks, EmbeddingPipeline().embed(chunks)))
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file, read in large blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_hash(chunk: str) -> str:
+    """Return the content hash used to key a chunk in the embedding index."""
+    return hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+
+class EmbeddingIndex:
+    """Persistent per-document embedding index.
+
+    Chunk texts and their content hashes live in ``chunks.jsonl``; embeddings
+    are stored L2-normalized as raw float32 rows in ``embeddings.f32`` (shape
+    kept in ``meta.json``) and opened memory-mapped, so reopening an indexed
+    document does not read the matrix into RAM and retrieval can score it
+    directly.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.meta: dict = {}
+        self.texts: List[str] = []
+        self.hashes: List[str] = []
+        self.matrix: Optional[np.ndarray] = None
+        self._backend = None
+        self._backend_config: Tuple[str, dict] = ('exact', {})
+
+    @classmethod
+    def for_document(cls, pdf_path: str, root: Path = INDEX_DIR) -> 'EmbeddingIndex':
+        """Open (or prepare) the index belonging to a PDF path."""
+        key = hashlib.sha256(str(Path(pdf_path).resolve()).encode('utf-8')).hexdigest()[:16]
+        index = cls(root / key)
+        index.load()
+        return index
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / 'meta.json'
+
+    @property
+    def _chunks_path(self) -> Path:
+        return self.directory / 'chunks.jsonl'
+
+    @property
+    def _matrix_path(self) -> Path:
+        return self.directory / 'embeddings.f32'
+
+    def load(self) -> bool:
+        """Load metadata and memory-map the embedding matrix, if present."""
+        try:
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            texts, hashes = [], []
+            with open(self._chunks_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    texts.append(record['text'])
+                    hashes.append(record['hash'])
+            shape = (meta['count'], meta['dim'])
+            if shape[0] and shape[1]:
+                matrix = np.memmap(self._matrix_path, dtype=np.float32, mode='r', shape=shape)
+            else:
+                matrix = np.zeros(shape, dtype=np.float32)
+        except (OSError, ValueError, KeyError):
+            return False
+        if meta.get('model') != EMBEDDING_MODEL or len(texts) != matrix.shape[0]:
+            return False
+        self.meta = meta
+        self.texts = texts
+        self.hashes = hashes
+        self.matrix = matrix
+        return True
+
+    def is_current(self, source_hash: str, chunking: dict) -> bool:
+        """True when the index was built from this exact file and chunking setup."""
+        return (
+            self.matrix is not None
+            and self.meta.get('source_sha256') == source_hash
+            and self.meta.get('chunking') == chunking
+        )
+
+    def update(self, chunks: Iterable[str], embed: Callable[[List[str]], List[List[float]]],
+               source_hash: str, chunking: dict, window: int = EMBED_BATCH_SIZE * EMBED_CONCURRENCY) -> int:
+        """Rebuild the index from a stream of chunks, embedding only unseen content.
+
+        Chunks are consumed ``window`` at a time: while one window is being
+        embedded on a background thread the next is read from ``chunks``, so
+        extraction and embedding overlap and only two windows are held in
+        memory. Rows for already-indexed hashes are copied from the old
+        matrix. Returns the number of chunks that had to be embedded.
+        """
+        known = {}
+        for row, h in enumerate(self.hashes):
+            known.setdefault(h, row)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_matrix = self._matrix_path.with_suffix('.tmp')
+        tmp_chunks = self._chunks_path.with_suffix('.tmp')
+        state = {'count': 0, 'dim': self.matrix.shape[1] if self.matrix is not None else 0, 'embedded': 0}
+
+        def submit(pool, batch: List[Tuple[str, str]]):
+            pending = {}
+            for h, text in batch:
+                if h not in known and h not in pending:
+                    pending[h] = text
+            state['embedded'] += len(pending)
+            if not pending:
+                return batch, None
+            texts = list(pending.values())
+            return batch, pool.submit(lambda: dict(zip(pending, embed(texts))))
+
+        def write_window(item, rows_out, chunks_out) -> None:
+            batch, future = item
+            fresh = future.result() if future is not None else {}
+            if fresh:
+                state['dim'] = len(next(iter(fresh.values())))
+            block = np.empty((len(batch), state['dim']), dtype=np.float32)
+            reuse = [pos for pos, (h, _) in enumerate(batch) if h in known]
+            if reuse:
+                block[reuse] = normalize_rows(self.matrix[[known[batch[pos][0]] for pos in reuse]])
+            new = [pos for pos, (h, _) in enumerate(batch) if h not in known]
+            if new:
+                block[new] = normalize_rows([fresh[batch[pos][0]] for pos in new])
+            rows_out.write(block.tobytes())
+            for h, text in batch:
+                chunks_out.write(json.dumps({'hash': h, 'text': text}) + '\n')
+            state['count'] += len(batch)
+
+        with open(tmp_matrix, 'wb') as rows_out, open(tmp_chunks, 'w', encoding='utf-8') as chunks_out, \
+                ThreadPoolExecutor(max_workers=1) as pool:
+            in_flight = None
+            batch: List[Tuple[str, str]] = []
+            for chunk in chunks:
+                batch.append((chunk_hash(chunk), chunk))
+                if len(batch) >= window:
+                    previous, in_flight = in_flight, submit(pool, batch)
+                    batch = []
+                    if previous is not None:
+                        write_window(previous, rows_out, chunks_out)
+            previous, in_flight = in_flight, (submit(pool, batch) if batch else None)
+            for item in (previous, in_flight):
+                if item is not None:
+                    write_window(item, rows_out, chunks_out)
+
+        # Drop the old mapping before replacing the files underneath it
+        self.matrix = None
+        self._backend = None
+        os.replace(tmp_matrix, self._matrix_path)
+        os.replace(tmp_chunks, self._chunks_path)
+        for stale in self.directory.glob('backend-*.npz'):
+            stale.unlink()
+        self.meta = {
+            'model': EMBEDDING_MODEL,
+            'source_sha256': source_hash,
+            'chunking': chunking,
+            'count': state['count'],
+            'dim': state['dim'],
+        }
+        with open(self._meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        self.load()
+        return state['embedded']
+
+    @property
+    def version(self) -> str:
+        """Identifier that changes whenever the indexed content changes."""
+        return hashlib.sha256(json.dumps(self.meta, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    def backend(self, mode: Optional[str] = None, **options):
+        """Return the retrieval backend for this index, building it once.
+
+        The chosen ``mode`` and options are remembered, so ``backend()``
+        without a mode returns the configured backend (exact by default),
+        also after the index is rewritten. Backends that can persist
+        themselves (``save``/``load``) are cached in the index directory and
+        invalidated whenever the index is rewritten.
+        """
+        if mode is None:
+            mode, options = self._backend_config
+        else:
+            self._backend_config = (mode, options)
+        if self._backend is not None and self._backend.mode == mode:
+            return self._backend
+        backend_cls = RETRIEVAL_BACKENDS[mode]
+        cache_path = self.directory / f'backend-{mode}.npz'
+        backend = None
+        if hasattr(backend_cls, 'load') and cache_path.exists():
+            backend = backend_cls.load(cache_path, self.matrix, **options)
+        if backend is None:
+            backend = backend_cls(self.matrix, **options)
+            if hasattr(backend, 'save'):
+                backend.save(cache_path)
+        self._backend = backend
+        return backend
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self):
+        """Yield (chunk_text, embedding) pairs like ``embed_chunks`` output."""
+        for row, text in enumerate(self.texts):
+            yield text, self.matrix[row]
 
 def cosine_similarity(a: List[float], b: List[float]) -> float:
     """Compute cosine similarity between two vectors."""
@@ -71,12 +560,305 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
     norm_b = math.sqrt(sum(x*x for x in b))
     return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
 
-def retrieve_relevant_chunks(query: str, embedded_chunks: List[Tuple[str, List[float]]], top_k: int = 3) -> List[str]:
+def normalize_rows(vectors) -> np.ndarray:
+    """Return vectors as a contiguous float32 array scaled to unit length."""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k highest scores, best first, via argpartition."""
+    top_k = min(top_k, scores.shape[0])
+    if top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < scores.shape[0]:
+        candidates = np.argpartition(scores, -top_k)[-top_k:]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+class ExactBackend:
+    """Brute-force search: one matrix-vector product over every chunk."""
+
+    mode = 'exact'
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.matrix @ query
+        best = top_k_indices(scores, top_k)
+        return best, scores[best]
+
+class IVFBackend:
+    """Inverted-file approximate search.
+
+    Rows are clustered with spherical k-means into ``nlist`` lists; a query only
+    scores the rows in its ``nprobe`` closest lists. Raising ``nprobe`` trades
+    latency for recall (``nprobe == nlist`` is exact search).
+    """
+
+    mode = 'ivf'
+
+    def __init__(self, matrix: np.ndarray, nlist: Optional[int] = None, nprobe: int = 8,
+                 iterations: int = 10, sample_per_list: int = 40, seed: int = 0):
+        self.matrix = matrix
+        self.nprobe = nprobe
+        n = matrix.shape[0]
+        self.nlist = max(1, min(n, nlist or int(round(np.sqrt(n)))))
+        self.centroids = self._train(iterations, sample_per_list, seed)
+        assignments = self._assign(self.centroids)
+        self.order = np.argsort(assignments, kind='stable')
+        self.offsets = np.searchsorted(assignments[self.order], np.arange(self.nlist + 1))
+
+    def _train(self, iterations: int, sample_per_list: int, seed: int) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        n = self.matrix.shape[0]
+        sample_idx = np.sort(rng.choice(n, size=min(n, self.nlist * sample_per_list), replace=False))
+        sample = np.asarray(self.matrix[sample_idx], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=self.nlist, replace=False)].copy()
+        members = np.zeros((self.nlist, len(sample)), dtype=np.float32)
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            members[:] = 0.0
+            members[assign, np.arange(len(sample))] = 1.0
+            sums = members @ sample
+            filled = members.any(axis=1)
+            # Empty lists keep their previous centroid
+            centroids[filled] = normalize_rows(sums[filled])
+        return centroids
+
+    def _assign(self, centroids: np.ndarray) -> np.ndarray:
+        n = self.matrix.shape[0]
+        assignments = np.empty(n, dtype=np.int64)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.matrix[start:start + SEARCH_BLOCK_ROWS])
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        probe = top_k_indices(self.centroids @ query, self.nprobe)
+        candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probe])
+        candidates.sort()  # Sequential access pattern for memory-mapped rows
+        scores = self.matrix[candidates] @ query
+        best = top_k_indices(scores, top_k)
+        return candidates[best], scores[best]
+
+    def save(self, path: Path) -> None:
+        np.savez(path, centroids=self.centroids, order=self.order, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path: Path, matrix: np.ndarray, nlist: Optional[int] = None,
+             nprobe: int = 8, **_) -> Optional['IVFBackend']:
+        """Restore saved lists; returns None if they do not fit ``matrix``."""
+        try:
+            data = np.load(path)
+        except (OSError, ValueError):
+            return None
+        if data['order'].shape[0] != matrix.shape[0] or (nlist and nlist != data['centroids'].shape[0]):
+            return None
+        backend = cls.__new__(cls)
+        backend.matrix = matrix
+        backend.nprobe = nprobe
+        backend.centroids = data['centroids']
+        backend.order = data['order']
+        backend.offsets = data['offsets']
+        backend.nlist = backend.centroids.shape[0]
+        return backend
+
+# Registry of retrieval backends; add entries here to plug in other ANN indexes
+RETRIEVAL_BACKENDS = {
+    'exact': ExactBackend,
+    'ivf': IVFBackend,
+}
+
+def embed_query(query: str) -> np.ndarray:
+    """Embed a question and return it as a unit vector."""
+    query_emb = openai.Embedding.create(model=EMBEDDING_MODEL, input=query)['data'][0]['embedding']
+    return normalize_rows(query_emb)
+
+def search_chunks(query_vec: np.ndarray, embedded_chunks, top_k: int = 3) -> Tuple[List[int], List[str]]:
+    """Return (chunk ids, chunk texts) of the top_k chunks for a query vector.
+
+    ``embedded_chunks`` is either an ``EmbeddingIndex`` (searched with its
+    configured backend) or a list of (chunk_text, embedding) pairs.
+    """
+    if isinstance(embedded_chunks, EmbeddingIndex):
+        texts = embedded_chunks.texts
+        backend = embedded_chunks.backend()
+    else:
+        texts = [txt for txt, _ in embedded_chunks]
+        backend = ExactBackend(normalize_rows([emb for _, emb in embedded_chunks]))
+    best, _ = backend.search(query_vec, top_k)
+    ids = [int(i) for i in best]
+    return ids, [texts[i] for i in ids]
+
+def retrieve_relevant_chunks(query: str, embedded_chunks, top_k: int = 3) -> List[str]:
     """Return the top_k most relevant chunk texts for a query."""
-    query_emb = openai.Embedding.create(model='text-embedding-ada-002', input=query)['data'][0]['embedding']
-    scored = [(cosine_similarity(query_emb, emb), txt) for txt, emb in embedded_chunks]
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [txt for _, txt in scored[:top_k]]
+    return search_chunks(embed_query(query), embedded_chunks, top_k)[1]
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a question used in answer cache keys."""
+    return ' '.join(question.lower().split()).rstrip('?!. ')
+
+class AnswerCache:
+    """LRU/TTL cache of answers keyed on (index version, chunk ids, question).
+
+    ``get`` looks up an exactly repeated question (after normalization) and
+    needs no network call at all. When ``similarity`` is set, ``get_similar``
+    additionally accepts a past question whose embedding has at least that
+    cosine similarity to the new one and that retrieved the same chunks.
+    Each lookup counts its own hits and misses in ``stats``.
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL,
+                 similarity: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.entries: 'OrderedDict[tuple, dict]' = OrderedDict()
+        self._by_question = {}
+        self._matrix = None
+        self.stats = {'hits': 0, 'misses': 0, 'semantic_hits': 0, 'semantic_misses': 0}
+
+    def _expired(self, entry: dict) -> bool:
+        return self.ttl is not None and time.time() - entry['created'] > self.ttl
+
+    def _drop(self, key: tuple) -> None:
+        self.entries.pop(key, None)
+        version, _, question = key
+        if self._by_question.get((version, question)) == key:
+            del self._by_question[(version, question)]
+        self._matrix = None
+
+    def get(self, version: str, question: str) -> Optional[str]:
+        """Answer for a repeated question, or None. Counts a miss on failure."""
+        key = self._by_question.get((version, normalize_question(question)))
+        entry = self.entries.get(key) if key else None
+        if entry is None or self._expired(entry):
+            if key:
+                self._drop(key)
+            self.stats['misses'] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry['answer']
+
+    def get_similar(self, version: str, query_vec: np.ndarray, chunk_ids: Sequence[int]) -> Optional[str]:
+        """Answer for a near-duplicate question that retrieved the same chunks.
+
+        Counts a semantic hit or miss unless similarity lookups are disabled.
+        """
+        if self.similarity is None:
+            return None
+        if self._matrix is None:
+            keys = [k for k, e in self.entries.items() if e['embedding'] is not None]
+            if not keys:
+                self.stats['semantic_misses'] += 1
+                return None
+            self._matrix = (keys, np.stack([self.entries[k]['embedding'] for k in keys]))
+        keys, matrix = self._matrix
+        scores = matrix @ query_vec
+        ids = tuple(chunk_ids)
+        for pos in np.argsort(scores)[::-1]:
+            if scores[pos] < self.similarity:
+                break
+            key = keys[pos]
+            entry = self.entries.get(key)
+            if key[0] != version or key[1] != ids or entry is None or self._expired(entry):
+                continue
+            self.entries.move_to_end(key)
+            self.stats['semantic_hits'] += 1
+            return entry['answer']
+        self.stats['semantic_misses'] += 1
+        return None
+
+    def put(self, version: str, question: str, chunk_ids: Sequence[int], answer: str,
+            query_vec: Optional[np.ndarray] = None, created: Optional[float] = None) -> None:
+        key = (version, tuple(chunk_ids), normalize_question(question))
+        old = self._by_question.get((version, key[2]))
+        if old is not None and old != key:
+            self._drop(old)
+        self.entries[key] = {
+            'answer': answer,
+            'embedding': None if query_vec is None else np.asarray(query_vec, dtype=np.float32),
+            'created': time.time() if created is None else created,
+        }
+        self.entries.move_to_end(key)
+        self._by_question[(version, key[2])] = key
+        self._matrix = None
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+
+    def save(self, path: Path) -> None:
+        """Persist unexpired entries as JSON, oldest first."""
+        records = [
+            {'version': k[0], 'chunk_ids': list(k[1]), 'question': k[2], 'answer': e['answer'],
+             'created': e['created'],
+             'embedding': None if e['embedding'] is None else e['embedding'].tolist()}
+            for k, e in self.entries.items() if not self._expired(e)
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+
+    def load(self, path: Path) -> None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return
+        for r in records:
+            vec = None if r['embedding'] is None else np.asarray(r['embedding'], dtype=np.float32)
+            self.put(r['version'], r['question'], r['chunk_ids'], r['answer'], vec, r['created'])
+
+def synthetic_embeddings(n: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors that stand in for real embeddings in benchmarks."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    noise = rng.standard_normal((n, dim), dtype=np.float32) * 0.6
+    return normalize_rows(centers[labels] + noise)
+
+def benchmark_retrieval(matrix: np.ndarray, queries: np.ndarray, top_k: int = 10,
+                        configs: Sequence[Tuple[str, dict]] = ()) -> List[dict]:
+    """Compare recall@k and p50/p99 latency of retrieval backends.
+
+    Recall is measured against exact search. Returns one result dict per config.
+    """
+    configs = configs or [('exact', {}), ('ivf', {'nprobe': 4}), ('ivf', {'nprobe': 16}), ('ivf', {'nprobe': 64})]
+    exact = ExactBackend(matrix)
+    truth = [set(exact.search(q, top_k)[0].tolist()) for q in queries]
+    built = {}
+    results = []
+    for mode, options in configs:
+        start = time.perf_counter()
+        if mode == 'ivf' and 'ivf' in built:
+            backend = built['ivf']
+            backend.nprobe = options.get('nprobe', backend.nprobe)
+            build_s = 0.0
+        else:
+            backend = RETRIEVAL_BACKENDS[mode](matrix, **options)
+            built[mode] = backend
+            build_s = time.perf_counter() - start
+        latencies = []
+        hits = 0
+        for q, expected in zip(queries, truth):
+            t0 = time.perf_counter()
+            found, _ = backend.search(q, top_k)
+            latencies.append(time.perf_counter() - t0)
+            hits += len(expected.intersection(found.tolist()))
+        lat_ms = np.array(latencies) * 1000
+        results.append({
+            'mode': mode,
+            'options': options,
+            'build_s': build_s,
+            f'recall@{top_k}': hits / (top_k * len(queries)),
+            'p50_ms': float(np.percentile(lat_ms, 50)),
+            'p99_ms': float(np.percentile(lat_ms, 99)),
+        })
+    return results
 
 def answer_question(question: str, context_chunks: List[str]) -> str:
     """Ask the LLM to answer using provided context."""
@@ -84,7 +866,8 @@ def answer_question(question: str, context_chunks: List[str]) -> str:
         "You are an assistant that answers questions based on the provided PDF content. "
         "Use only the supplied context and do not fabricate information."
     )
-    user_prompt = f"Context:\n{\"\n---\n\".join(context_chunks)}\n\nQuestion: {question}"
+    context = "\n---\n".join(context_chunks)
+    user_prompt = f"Context:\n{context}\n\nQuestion: {question}"
     response = openai.ChatCompletion.create(
         model=MODEL,
         messages=[
@@ -96,23 +879,88 @@ def answer_question(question: str, context_chunks: List[str]) -> str:
     )
     return response['choices'][0]['message']['content'].strip()
 
+def run_benchmark(n: int, dim: int, queries: int = 200, top_k: int = 10):
+    """Print a recall/latency table for all retrieval backends on synthetic data."""
+    print(f'Benchmarking retrieval on {n} synthetic chunks (dim={dim}, top_k={top_k})...')
+    matrix = synthetic_embeddings(n, dim)
+    rng = np.random.default_rng(1)
+    sample = matrix[rng.choice(n, size=queries, replace=False)]
+    query_vecs = normalize_rows(sample + rng.standard_normal(sample.shape, dtype=np.float32) * 0.3)
+    print(f"{'mode':<8}{'options':<16}{'build s':>9}{'recall':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in benchmark_retrieval(matrix, query_vecs, top_k):
+        opts = ','.join(f'{k}={v}' for k, v in r['options'].items()) or '-'
+        print(f"{r['mode']:<8}{opts:<16}{r['build_s']:>9.2f}{r[f'recall@{top_k}']:>9.3f}"
+              f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Chat with a PDF using OpenAI embeddings.')
+    parser.add_argument('pdf', nargs='?', help='Path to the PDF file.')
+    parser.add_argument('--retrieval', choices=sorted(RETRIEVAL_BACKENDS), default='exact',
+                        help='Retrieval backend (default: exact).')
+    parser.add_argument('--nlist', type=int, default=None, help='IVF: number of lists (default: sqrt(chunks)).')
+    parser.add_argument('--nprobe', type=int, default=8, help='IVF: lists searched per query; higher is slower but more accurate.')
+    parser.add_argument('--concurrency', type=int, default=EMBED_CONCURRENCY,
+                        help='Embedding requests kept in flight (default: %(default)s).')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='PDF extraction processes (default: CPU count).')
+    parser.add_argument('--cache-size', type=int, default=ANSWER_CACHE_SIZE, help='Answers kept in the answer cache.')
+    parser.add_argument('--cache-ttl', type=float, default=ANSWER_CACHE_TTL, help='Seconds before a cached answer expires.')
+    parser.add_argument('--cache-similarity', type=float, default=None, metavar='COS',
+                        help='Reuse answers of past questions with at least this cosine similarity (e.g. 0.95).')
+    parser.add_argument('--api-base', help='Alternative OpenAI-compatible endpoint, e.g. the local stub.')
+    parser.add_argument('--serve-stub', type=int, metavar='PORT', help='Run a local stub embeddings endpoint until Ctrl-C.')
+    parser.add_argument('--stub-delay', type=float, default=0.0, help='Seconds the stub waits per request.')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Benchmark retrieval backends on N synthetic chunks and exit.')
+    parser.add_argument('--bench-dim', type=int, default=384, help='Embedding size used by --benchmark.')
+    return parser.parse_args()
+
 def main():
-    if len(sys.argv) < 2:
+    args = parse_args()
+    if args.serve_stub:
+        server = start_stub_server(args.serve_stub, args.stub_delay)
+        print(f'Stub embeddings endpoint on http://127.0.0.1:{server.server_port}/v1', file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+    if args.api_base:
+        openai.api_base = args.api_base
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.bench_dim)
+        return
+    if not args.pdf:
         print('Usage: python ChatPDF.py <path_to_pdf>')
         sys.exit(1)
-    pdf_path = sys.argv[1]
+    pdf_path = args.pdf
     if not Path(pdf_path).is_file():
         print(f'Error: File not found – {pdf_path}')
         sys.exit(1)
-    print('Extracting text from PDF...')
-    raw_text = read_pdf(pdf_path)
-    if not raw_text.strip():
-        print('No extractable text found in the PDF.')
-        sys.exit(1)
-    print('Chunking text...')
-    chunks = chunk_text(raw_text)
-    print(f'Created {len(chunks)} chunks. Generating embeddings (this may take a while)...')
-    embedded_chunks = embed_chunks(chunks)
+    index = EmbeddingIndex.for_document(pdf_path)
+    source_hash = file_hash(pdf_path)
+    counter = TokenCounter()
+    chunking = {'max_tokens': MAX_TOKENS, 'overlap': CHUNK_OVERLAP, 'tokenizer': counter.name}
+    if index.is_current(source_hash, chunking):
+        print(f'Loaded cached index with {len(index)} chunks.')
+    else:
+        print('Extracting, chunking and embedding new or changed chunks...')
+        start = time.perf_counter()
+        pipeline = EmbeddingPipeline(concurrency=args.concurrency)
+        pages = iter_pages(pdf_path, workers=args.workers)
+        embedded = index.update(iter_chunks(pages, counter=counter), pipeline.embed, source_hash, chunking)
+        elapsed = time.perf_counter() - start
+        if not len(index):
+            print('No extractable text found in the PDF.')
+            sys.exit(1)
+        print(f'Indexed {len(index)} chunks: embedded {embedded}, reused {len(index) - embedded}.')
+        print(f"Ingest throughput: {len(index) / elapsed:.1f} chunks/sec "
+              f"({pipeline.stats['requests']} requests, {pipeline.stats['retries']} retries).")
+    options = {'nlist': args.nlist, 'nprobe': args.nprobe} if args.retrieval == 'ivf' else {}
+    index.backend(args.retrieval, **options)
+    cache = AnswerCache(max_entries=args.cache_size, ttl=args.cache_ttl, similarity=args.cache_similarity)
+    cache_path = index.directory / 'answers.json'
+    cache.load(cache_path)
     print('Ready! You can now ask questions about the document. Type "exit" to quit.')
     while True:
         try:
@@ -123,9 +971,21 @@ def main():
         if not question or question.lower() in {'exit', 'quit'}:
             print('Goodbye.')
             break
-        relevant = retrieve_relevant_chunks(question, embedded_chunks)
-        answer = answer_question(question, relevant)
+        answer = cache.get(index.version, question)
+        if answer is None:
+            query_vec = embed_query(question)
+            chunk_ids, relevant = search_chunks(query_vec, index)
+            answer = cache.get_similar(index.version, query_vec, chunk_ids)
+            if answer is None:
+                answer = answer_question(question, relevant)
+            cache.put(index.version, question, chunk_ids, answer, query_vec)
         print('\nAnswer:', answer)
+    cache.save(cache_path)
+    stats = cache.stats
+    print(f"Answer cache: {stats['hits']} hits, {stats['misses']} misses", end='')
+    if cache.similarity is not None:
+        print(f"; similar questions: {stats['semantic_hits']} hits, {stats['semantic_misses']} misses", end='')
+    print('.')
 
 if __name__ == '__main__':
     main()
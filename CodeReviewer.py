@@ -1,75 +1,587 @@
 	import os
+import re
 import sys
+import ast
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
 import argparse
 import textwrap
-import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Pool
+
+# Imported lazily: the library is slow to import and fully cached runs never need it
+openai = None
+
+def _import_openai():
+    """Return the openai module, or None if it is not installed."""
+    global openai
+    if openai is None:
+        try:
+            import openai as module
+        except ImportError:
+            return None
+        openai = module
+    return openai
+
+# Bump whenever the prompts change so cached reviews are not reused
+PROMPT_VERSION = 3
+REVIEW_PROMPT = (
+    "You are a Python code reviewer. Provide a concise list of improvements, "
+    "style suggestions, and potential bugs for the following code. Return only "
+    "the suggestions in plain text.\n\n```python\n{code}\n```"
+)
+HUNK_PROMPT = (
+    "You are a Python code reviewer. The following excerpts are the regions of a "
+    "file that changed, with surrounding context; each line is prefixed with its "
+    "line number. Provide a concise list of improvements, style suggestions, and "
+    "potential bugs in the changed code only. Return only the suggestions in plain "
+    "text.\n\n```python\n{code}\n```"
+)
+REVIEW_MODEL = "gpt-3.5-turbo"
+REVIEW_MAX_TOKENS = 500  # Output tokens per review request
+PIECE_TOKEN_BUDGET = 2500  # Estimated code tokens sent per review request
+MAX_IN_FLIGHT = 8  # Concurrent review requests
+CACHE_DIR = os.getenv("CODEREVIEWER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "codereviewer"))
 
-try:
-    import openai
-except ImportError:
-    openai = None
+def _api_base() -> str:
+    """The endpoint model reviews are sent to."""
+    if openai is not None:
+        return openai.api_base
+    return os.getenv("OPENAI_API_BASE") or "https://api.openai.com/v1"
 
 def _get_openai_api_key():
     """Retrieve OpenAI API key from environment variables."""
     return os.getenv("OPENAI_API_KEY")
 
-def _review_with_openai(code: str) -> str:
-    """Send code to OpenAI ChatCompletion and return suggestions.
+def _openai_client():
+    """Return the configured openai module.
     Raises RuntimeError if the library or API key is unavailable.
     """
-    if openai is None:
+    if _import_openai() is None:
         raise RuntimeError("OpenAI library not installed.")
     api_key = _get_openai_api_key()
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY environment variable not set.")
     openai.api_key = api_key
-    prompt = (
-        "You are a Python code reviewer. Provide a concise list of improvements, "
-        "style suggestions, and potential bugs for the following code. Return only "
-        "the suggestions in plain text.\n\n```python\n{code}\n```"
+    return openai
+
+def _review_with_openai(code: str, template: str = REVIEW_PROMPT) -> str:
+    """Send code to OpenAI ChatCompletion and return suggestions.
+    Raises RuntimeError if the library or API key is unavailable.
+    """
+    client = _openai_client()
+    response = client.ChatCompletion.create(
+        model=REVIEW_MODEL,
+        messages=[{"role": "user", "content": template.format(code=code)}],
+        temperature=0.2,
+        max_tokens=REVIEW_MAX_TOKENS,
     )
-    response = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
+    return response.choices[0].message.content.strip()
+
+async def _review_with_openai_async(code: str, template: str = REVIEW_PROMPT) -> str:
+    """Async variant of ``_review_with_openai``."""
+    client = _openai_client()
+    response = await client.ChatCompletion.acreate(
+        model=REVIEW_MODEL,
+        messages=[{"role": "user", "content": template.format(code=code)}],
         temperature=0.2,
-        max_tokens=500,
+        max_tokens=REVIEW_MAX_TOKENS,
     )
     return response.choices[0].message.content.strip()
 
-def _heuristic_review(code: str) -> str:
-    """Fallback reviewer that uses simple regex‑based heuristics."""
+class _HeuristicVisitor(ast.NodeVisitor):
+    """Collect every heuristic finding for a module in a single AST walk."""
+
+    def __init__(self):
+        self.has_print = False
+        self.has_main_guard = False
+        self.undocumented = []
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name) and node.func.id == "print":
+            self.has_print = True
+        self.generic_visit(node)
+
+    def visit_If(self, node):
+        test = node.test
+        if (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)):
+            sides = [test.left, test.comparators[0]]
+            names = [s for s in sides if isinstance(s, ast.Name) and s.id == "__name__"]
+            consts = [s for s in sides if isinstance(s, ast.Constant) and s.value == "__main__"]
+            if names and consts:
+                self.has_main_guard = True
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        if ast.get_docstring(node) is None:
+            self.undocumented.append(node.name)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+def _heuristic_findings(code: str, file_level: bool = True, piece_level: bool = True) -> list:
+    """Return heuristic suggestions for code as a list of strings.
+    File‑level findings (size, entry‑point guard, syntax) only make sense for a
+    whole file; piece‑level ones (prints, docstrings) also apply to fragments.
+    """
     suggestions = []
-    if len(code) > 1000:
+    if file_level and len(code) > 1000:
         suggestions.append("Consider splitting large file into modules.")
-    if re.search(r'\bprint\s*\(', code):
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        if file_level:
+            suggestions.append(f"Fix syntax error at line {e.lineno}: {e.msg}.")
+        return suggestions
+    visitor = _HeuristicVisitor()
+    visitor.visit(tree)
+    if piece_level and visitor.has_print:
         suggestions.append("Remove or replace print statements with logging.")
-    if re.search(r'if\s+__name__\s*==\s*[\'\"]__main__[\'\"]\s*:', code) is None:
+    if file_level and not visitor.has_main_guard:
         suggestions.append("Add an entry‑point guard (if __name__ == '__main__') if script is executable.")
-    functions = re.findall(r'def\s+(\w+)\s*\(.*?\):', code)
-    for func in functions:
-        # Check for a docstring directly after the function definition
-        pattern = rf'def\s+{func}\s*\(.*?\):\s*\n\s+"""'
-        if not re.search(pattern, code):
+    if piece_level:
+        for func in visitor.undocumented:
             suggestions.append(f"Add docstring to function '{func}'.")
+    return suggestions
+
+def _heuristic_review(code: str) -> str:
+    """Fallback reviewer that uses AST‑based heuristics."""
+    suggestions = _heuristic_findings(code)
     return "\n".join(suggestions) if suggestions else "No obvious issues detected."
 
+def _estimate_tokens(text: str) -> int:
+    """Rough token count for source code (about four characters per token)."""
+    return len(text) // 4 + 1
+
+def _node_start(node) -> int:
+    """First line of a statement, including its decorators."""
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+def _split_lines(lines: list, budget: int) -> list:
+    """Greedily group raw lines into pieces within the token budget."""
+    pieces, current = [], ""
+    for line in lines:
+        if current and _estimate_tokens(current + line) > budget:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+def _split_nodes(lines: list, nodes: list, first: int, last: int, budget: int, header: str = "") -> list:
+    """Group the statements spanning lines first..last into pieces within budget.
+    Leading comments and decorators stay with the statement that follows them.
+    Oversized classes are split between methods with the class line repeated
+    as ``header``; other oversized statements are split by lines.
+    """
+    pieces, current = [], ""
+    start = first
+    for i, node in enumerate(nodes):
+        end = last if i == len(nodes) - 1 else node.end_lineno
+        text = "".join(lines[start - 1:end])
+        if _estimate_tokens(header + current + text) <= budget:
+            current += text
+        else:
+            if current:
+                pieces.append(header + current)
+                current = ""
+            if _estimate_tokens(header + text) <= budget:
+                current = text
+            elif isinstance(node, ast.ClassDef) and node.body:
+                body_start = _node_start(node.body[0])
+                class_header = "".join(lines[start - 1:body_start - 1])
+                pieces.extend(_split_nodes(lines, node.body, body_start, end, budget, header + class_header))
+            else:
+                room = max(budget - _estimate_tokens(header), 1)
+                pieces.extend(header + piece for piece in _split_lines(lines[start - 1:end], room))
+        start = end + 1
+    if current:
+        pieces.append(header + current)
+    return pieces
+
+def _split_code(code: str, budget: int = PIECE_TOKEN_BUDGET) -> list:
+    """Split source into pieces at function and class boundaries to fit budget."""
+    if _estimate_tokens(code) <= budget:
+        return [code]
+    lines = code.splitlines(keepends=True)
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return _split_lines(lines, budget)
+    if not tree.body:
+        return _split_lines(lines, budget)
+    return _split_nodes(lines, tree.body, 1, len(lines), budget)
+
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+def _merge_suggestions(texts: list) -> str:
+    """Merge per‑piece reviews into one list, dropping duplicates and bullets."""
+    seen = set()
+    merged = []
+    for text in texts:
+        for line in text.splitlines():
+            item = _BULLET.sub("", line).strip()
+            key = item.lower().rstrip(".")
+            if not item or key == "no obvious issues detected" or key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+    return "\n".join(merged) if merged else "No obvious issues detected."
+
+def _model_available() -> bool:
+    try:
+        _openai_client()
+    except RuntimeError:
+        return False
+    return True
+
+async def _run_cpu(executor, func, *args, **kwargs):
+    """Run CPU‑bound work in ``executor`` (a process pool) so the event loop keeps serving requests."""
+    if executor is None:
+        return func(*args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
+
+async def _review_async(code: str, mode: str, excerpt: str = None, limit: asyncio.Semaphore = None,
+                        budget: int = PIECE_TOKEN_BUDGET, executor: ProcessPoolExecutor = None) -> tuple:
+    """Review code with the model, split into pieces reviewed concurrently.
+    At most ``limit`` requests are in flight (shared across files). A piece
+    whose request fails is reviewed with heuristics instead, and whole‑file
+    heuristics are then added once; heuristics run in ``executor`` when
+    given. Returns (reviewer, text) where reviewer is 'openai', 'heuristic'
+    or 'mixed'.
+    """
+    if mode == "heuristic":
+        return "heuristic", await _run_cpu(executor, _heuristic_review, code)
+    try:
+        _openai_client()
+    except RuntimeError:
+        if mode == "openai":
+            raise
+        return "heuristic", await _run_cpu(executor, _heuristic_review, code)
+    limit = limit or asyncio.Semaphore(MAX_IN_FLIGHT)
+    if excerpt is not None:
+        template = HUNK_PROMPT
+        pieces = _split_lines(excerpt.splitlines(keepends=True), budget)
+    else:
+        template = REVIEW_PROMPT
+        pieces = _split_code(code, budget)
+
+    async def review_piece(piece: str):
+        try:
+            async with limit:
+                return await _review_with_openai_async(piece, template), True
+        except Exception:
+            if excerpt is not None:
+                return "", False
+            return "\n".join(await _run_cpu(executor, _heuristic_findings, piece, file_level=False)), False
+
+    results = await asyncio.gather(*(review_piece(piece) for piece in pieces))
+    texts = [text for text, _ in results]
+    failed = sum(1 for _, ok in results if not ok)
+    if failed and excerpt is not None:
+        # Excerpts cannot be parsed, so fall back to heuristics on the whole file
+        texts.append(await _run_cpu(executor, _heuristic_review, code))
+    elif failed:
+        texts.insert(0, "\n".join(await _run_cpu(executor, _heuristic_findings, code, piece_level=False)))
+    reviewer = "openai" if not failed else "heuristic" if failed == len(results) else "mixed"
+    return reviewer, _merge_suggestions(texts)
+
+def _review(code: str, mode: str = "auto", excerpt: str = None) -> tuple:
+    """Review code with the requested reviewer and return (reviewer, text).
+    In 'auto' mode OpenAI is tried first and heuristics are the fallback.
+    When an excerpt of changed hunks is given only it is sent to the model;
+    heuristics always run on the whole file.
+    """
+    if mode == "heuristic":
+        return "heuristic", _heuristic_review(code)
+    return asyncio.run(_review_async(code, mode, excerpt))
+
 def review_code(code: str) -> str:
     """Try OpenAI review first, fall back to heuristic if any error occurs."""
-    try:
-        return _review_with_openai(code)
-    except Exception:
-        return _heuristic_review(code)
+    return _review(code)[1]
 
 def _load_code(path: str) -> str:
     """Read file content with UTF‑8 encoding."""
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
+class _ReviewCache:
+    """SQLite store of finished reviews keyed by content hash, mode, prompt version, model and endpoint."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "reviews.sqlite3"))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS reviews ("
+            "key TEXT PRIMARY KEY, reviewer TEXT NOT NULL, review TEXT NOT NULL, created REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def key(code: str, mode: str, excerpt: str = None) -> str:
+        digest = hashlib.sha256(f"{mode}\0{PROMPT_VERSION}\0".encode("utf-8"))
+        if mode != "heuristic":
+            # Reviews from another model or endpoint (e.g. a local stub) are not interchangeable
+            digest.update(f"{REVIEW_MODEL}\0{_api_base()}\0".encode("utf-8"))
+        digest.update(code.encode("utf-8"))
+        if excerpt is not None:
+            digest.update(b"\0hunks\0" + excerpt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """Return (reviewer, review) for key, or None."""
+        return self.conn.execute("SELECT reviewer, review FROM reviews WHERE key = ?", (key,)).fetchone()
+
+    def put(self, key: str, reviewer: str, review: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO reviews (key, reviewer, review, created) VALUES (?, ?, ?, ?)",
+                (key, reviewer, review, time.time()),
+            )
+
+    @staticmethod
+    def cacheable(mode: str, reviewer: str) -> bool:
+        # Reviews where any piece fell back to heuristics ('heuristic' or
+        # 'mixed' outside heuristic mode) should retry the model next time
+        return mode == "heuristic" or reviewer == "openai"
+
+def _git(args: list, cwd: str) -> str:
+    """Run a git command and return its stdout."""
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+def _changed_ranges(repo: str, rev: str) -> dict:
+    """Map each .py file changed since rev to its changed (start, end) line ranges."""
+    top = _git(["rev-parse", "--show-toplevel"], repo).strip()
+    diff = _git(["diff", "--unified=0", "--no-color", "--diff-filter=AM", rev, "--", "*.py"], top)
+    ranges = {}
+    current = None
+    for line in diff.splitlines():
+        if line.startswith("+++ "):
+            current = os.path.join(top, line[6:]) if line.startswith("+++ b/") else None
+            if current:
+                ranges.setdefault(current, [])
+        elif current and line.startswith("@@"):
+            match = _HUNK_HEADER.match(line)
+            if match:
+                start = int(match.group(1))
+                length = int(match.group(2)) if match.group(2) is not None else 1
+                # Pure deletions (length 0) are anchored at the preceding line
+                ranges[current].append((start, start + max(length, 1) - 1))
+    return ranges
+
+def _hunk_excerpt(code: str, ranges: list, context: int) -> str:
+    """Numbered excerpt of the changed line ranges plus context lines."""
+    lines = code.splitlines()
+    spans = []
+    for start, end in sorted(ranges):
+        start, end = max(1, start - context), min(len(lines), end + context)
+        if start > end:
+            continue
+        if spans and start <= spans[-1][1] + 1:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    return "\n...\n".join(
+        "\n".join(f"{n:>5}| {lines[n - 1]}" for n in range(start, end + 1)) for start, end in spans
+    )
+
+_SKIP_DIRS = {"__pycache__", "venv", "node_modules", "build", "dist"}
+
+def _iter_python_files(root: str):
+    """Yield Python files below root, skipping hidden and tooling directories."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d not in _SKIP_DIRS)
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                yield os.path.join(dirpath, name)
+
+def _review_task(task: tuple) -> dict:
+    """Pool task of ``review_files``: review one prepared (path, mode, code, excerpt, key) tuple.
+
+    Only heuristic reviews are sent here, with ``mode`` already set to
+    'heuristic' when 'auto' had no usable model; model reviews go through
+    ``_review_pending_async``.
+    """
+    path, mode, code, excerpt, key = task
+    try:
+        reviewer, text = _review(code, mode, excerpt)
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+    return {"path": path, "reviewer": reviewer, "review": text, "key": key}
+
+def _emit(out, result: dict) -> None:
+    record = {k: v for k, v in result.items() if k not in ("review", "key")}
+    if "review" in result:
+        record["suggestions"] = result["review"].splitlines()
+    out.write(json.dumps(record) + "\n")
+    out.flush()
+
+async def _review_pending_async(pending: list, max_in_flight: int, out, cache: _ReviewCache = None,
+                                executor: ProcessPoolExecutor = None) -> None:
+    """Review prepared files with the model, at most max_in_flight requests at a time.
+    Heuristic fallbacks run in ``executor``.
+    """
+    limit = asyncio.Semaphore(max_in_flight)
+
+    async def review_one(task: tuple) -> dict:
+        path, mode, code, excerpt, key = task
+        try:
+            reviewer, text = await _review_async(code, mode, excerpt, limit, executor=executor)
+        except Exception as e:
+            return {"path": path, "error": str(e)}
+        return {"path": path, "reviewer": reviewer, "review": text, "key": key, "mode": mode}
+
+    for next_result in asyncio.as_completed([review_one(task) for task in pending]):
+        result = await next_result
+        mode = result.pop("mode", None)
+        if cache is not None and "review" in result and cache.cacheable(mode, result["reviewer"]):
+            cache.put(result["key"], result["reviewer"], result["review"])
+        _emit(out, result)
+
+def review_files(paths, mode: str = "auto", jobs: int = None, out=sys.stdout,
+                 cache: _ReviewCache = None, hunks: dict = None, context: int = 3,
+                 max_in_flight: int = MAX_IN_FLIGHT) -> int:
+    """Review files, streaming JSON lines in completion order.
+    Heuristic reviews (including 'auto' without a usable model) run in a
+    process pool; model reviews run on one event loop with at most
+    ``max_in_flight`` requests outstanding, and their heuristic fallbacks
+    go to a process pool as well. Cached reviews
+    are emitted straight away. With ``hunks`` (path -> changed line ranges)
+    only those regions go to the model. Returns the number of files processed.
+    """
+    count = 0
+    pending = []
+    for path in paths:
+        count += 1
+        try:
+            code = _load_code(path)
+        except (OSError, UnicodeDecodeError) as e:
+            _emit(out, {"path": path, "error": str(e)})
+            continue
+        excerpt = _hunk_excerpt(code, hunks[path], context) if hunks is not None else None
+        key = _ReviewCache.key(code, mode, excerpt)
+        hit = cache.get(key) if cache is not None else None
+        if hit:
+            _emit(out, {"path": path, "reviewer": hit[0], "review": hit[1], "cached": True})
+            continue
+        pending.append((path, mode, code, excerpt, key))
+    if not pending:
+        return count
+    jobs = min(jobs or os.cpu_count() or 1, len(pending))
+    if mode == "auto" and not _model_available():
+        pending = [(path, "heuristic", code, excerpt, key) for path, _, code, excerpt, key in pending]
+    elif mode != "heuristic":
+        with ProcessPoolExecutor(jobs) as executor:
+            asyncio.run(_review_pending_async(pending, max_in_flight, out, cache, executor))
+        return count
+    with Pool(processes=jobs) as pool:
+        for result in pool.imap_unordered(_review_task, pending, chunksize=16):
+            if cache is not None and "review" in result and cache.cacheable(mode, result["reviewer"]):
+                cache.put(result["key"], result["reviewer"], result["review"])
+            _emit(out, result)
+    return count
+
+def review_tree(root: str, mode: str = "auto", jobs: int = None, out=sys.stdout, cache: _ReviewCache = None,
+                max_in_flight: int = MAX_IN_FLIGHT) -> int:
+    """Review every Python file below root; see ``review_files``."""
+    return review_files(_iter_python_files(root), mode, jobs, out, cache, max_in_flight=max_in_flight)
+
+def review_since(repo: str, rev: str, mode: str = "auto", jobs: int = None, out=sys.stdout,
+                 cache: _ReviewCache = None, context: int = 3, max_in_flight: int = MAX_IN_FLIGHT) -> int:
+    """Review only the hunks of .py files changed since rev; see ``review_files``."""
+    hunks = _changed_ranges(repo, rev)
+    return review_files(sorted(hunks), mode, jobs, out, cache, hunks, context, max_in_flight)
+
+class _StubReviewHandler(BaseHTTPRequestHandler):
+    """Minimal ChatCompletion endpoint returning canned suggestions."""
+
+    delay = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        time.sleep(self.delay)
+        content = f"- Stub review of {prompt.count(chr(10))} lines.\n- Consider adding type hints."
+        payload = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_stub(port: int, delay: float = 0.0) -> None:
+    """Serve a local stub model endpoint for tests and benchmarks.
+    Point the reviewer at it with --api-base http://127.0.0.1:PORT/v1.
+    """
+    _StubReviewHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), _StubReviewHandler)
+    print(f"Stub review endpoint on http://127.0.0.1:{port}/v1", file=sys.stderr)
+    server.serve_forever()
+
 def main():
     parser = argparse.ArgumentParser(description="AI‑powered Python code reviewer.")
-    parser.add_argument("path", nargs="?", help="Path to Python file to review.")
+    parser.add_argument("path", nargs="?", help="Path to Python file (or directory with --recursive) to review.")
+    parser.add_argument("--recursive", "-r", action="store_true",
+                        help="Review every .py file under a directory and stream JSON lines.")
+    parser.add_argument("--mode", choices=["auto", "openai", "heuristic"], default="auto",
+                        help="Reviewer to use (default: OpenAI with heuristic fallback).")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes for --recursive (default: CPU count).")
+    parser.add_argument("--since", metavar="REV",
+                        help="Review only hunks of .py files changed since a git revision (path is the repo, default: .).")
+    parser.add_argument("--context", type=int, default=3, help="Context lines around each hunk for --since (default: 3).")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Directory of the review cache.")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the review cache.")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT,
+                        help=f"Concurrent model requests (default: {MAX_IN_FLIGHT}).")
+    parser.add_argument("--api-base", help="Alternative OpenAI‑compatible endpoint, e.g. a local stub.")
+    parser.add_argument("--serve-stub", type=int, metavar="PORT", help="Run a local stub model endpoint and exit on Ctrl‑C.")
+    parser.add_argument("--stub-delay", type=float, default=0.0, help="Seconds the stub waits per request.")
     args = parser.parse_args()
 
+    if args.serve_stub:
+        try:
+            serve_stub(args.serve_stub, args.stub_delay)
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.api_base:
+        os.environ["OPENAI_API_BASE"] = args.api_base
+        if _import_openai() is not None:
+            openai.api_base = args.api_base
+    cache = None if args.no_cache else _ReviewCache(args.cache_dir)
+
+    if args.since:
+        repo = args.path or "."
+        try:
+            review_since(repo, args.since, args.mode, args.jobs, cache=cache, context=args.context,
+                         max_in_flight=args.max_in_flight)
+        except subprocess.CalledProcessError as e:
+            print(f"Error: git failed: {e.stderr.strip()}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.recursive:
+        if not args.path or not os.path.isdir(args.path):
+            print(f"Error: Directory '{args.path}' not found.", file=sys.stderr)
+            sys.exit(1)
+        review_tree(args.path, args.mode, args.jobs, cache=cache, max_in_flight=args.max_in_flight)
+        return
+
     if args.path:
         if not os.path.isfile(args.path):
             print(f"Error: File '{args.path}' not found.", file=sys.stderr)
@@ -85,7 +597,15 @@ def main():
         print("No file provided. Reviewing sample code.")
 
     print("=== Review ===")
-    print(review_code(code))
+    key = _ReviewCache.key(code, args.mode)
+    hit = cache.get(key) if cache else None
+    if hit:
+        print(hit[1])
+        return
+    reviewer, text = _review(code, args.mode)
+    if cache and cache.cacheable(args.mode, reviewer):
+        cache.put(key, reviewer, text)
+    print(text)
 
 if __name__ == "__main__":
     main()
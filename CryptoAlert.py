@@ -1,15 +1,401 @@
 	import requests
 import time
 import sys
-from typing import Dict, Any
+import random
+import asyncio
+import argparse
+import json
+import struct
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+from urllib.parse import quote
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:
+    aiohttp = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 API_URL = "https://api.coingecko.com/api/v3/simple/price"
+MAX_URL_LENGTH = 2000  # Conservative limit accepted by servers and proxies
+MAX_CONNECTIONS = 8  # Keep-alive connections shared by all sources
+TICK_RECORD = struct.Struct("<dId")  # timestamp, coin index, price: 20 bytes
+TICK_TAIL_SIZE = 10_000  # Recent ticks kept in memory by TickStore
+
+
+def batch_ids(ids: List[str], base_url: str = API_URL, vs_currency: str = "usd",
+              max_url_length: int = MAX_URL_LENGTH) -> List[List[str]]:
+    """Split coin ids into batches whose request URL stays under max_url_length."""
+    overhead = len(f"{base_url}?ids=&vs_currencies={vs_currency}")
+    batches: List[List[str]] = []
+    current: List[str] = []
+    length = overhead
+    for coin in ids:
+        cost = len(quote(coin, safe="")) + (3 if current else 0)  # ',' is sent as %2C
+        if current and length + cost > max_url_length:
+            batches.append(current)
+            current, length = [], overhead
+            cost -= 3
+        current.append(coin)
+        length += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+class PriceSource:
+    """A price endpoint polled for a set of coin ids on its own schedule.
+
+    The endpoint must answer CoinGecko ``simple/price`` style requests.
+    ``ids`` may be a callable returning the current ids; it is consulted
+    on every poll and the batches are rebuilt when the ids change.
+    """
+
+    def __init__(self, name: str, ids: Union[List[str], Callable[[], Iterable[str]]], url: str = API_URL,
+                 interval: float = 60, jitter: float = 0.0, vs_currency: str = "usd"):
+        self.name = name
+        self.url = url
+        self.interval = interval
+        self.jitter = jitter
+        self.vs_currency = vs_currency
+        self.ids = ids
+        self._batched_ids: Optional[Tuple[str, ...]] = None
+        self.batches: List[List[str]] = []
+        self.current_batches()
+
+    def current_batches(self) -> List[List[str]]:
+        ids = tuple(self.ids() if callable(self.ids) else self.ids)
+        if ids != self._batched_ids:
+            self._batched_ids = ids
+            self.batches = batch_ids(list(ids), self.url, self.vs_currency)
+        return self.batches
+
+
+class AsyncPricePoller:
+    """Polls several price sources concurrently over one keep-alive session.
+
+    Every batch of a source is fetched concurrently and its prices are
+    queued as soon as that batch arrives; each source sleeps its own
+    interval plus random jitter between polls. Price updates are put on
+    ``queue`` and never wait for the consumer.
+    """
+
+    def __init__(self, sources: List[PriceSource], queue: "asyncio.Queue", timeout: float = 10,
+                 max_connections: int = MAX_CONNECTIONS):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for async polling. Install with 'pip install aiohttp'.")
+        self.sources = sources
+        self.queue = queue
+        self.timeout = timeout
+        self.max_connections = max_connections
+
+    async def _fetch_batch(self, session: "aiohttp.ClientSession", source: PriceSource,
+                           ids: List[str]) -> Dict[str, float]:
+        params = {"ids": ",".join(ids), "vs_currencies": source.vs_currency}
+        try:
+            async with session.get(source.url, params=params) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+        except Exception as e:
+            print(f"[Error] {source.name}: failed to fetch {len(ids)} prices: {e}", file=sys.stderr)
+            return {}
+        return {coin: data[coin][source.vs_currency] for coin in ids
+                if coin in data and source.vs_currency in data[coin]}
+
+    async def _poll(self, session: "aiohttp.ClientSession", source: PriceSource) -> None:
+        # Spread the first polls of different sources apart
+        await asyncio.sleep(random.uniform(0, source.jitter))
+        while True:
+            # Each batch is queued as soon as it arrives, so one slow batch
+            # does not hold back the prices of the others
+            fetches = [asyncio.ensure_future(self._fetch_batch(session, source, ids))
+                       for ids in source.current_batches()]
+            try:
+                for part in asyncio.as_completed(fetches):
+                    prices = await part
+                    if prices:
+                        self.queue.put_nowait(prices)
+            finally:
+                # Don't leave fetches running on a session that is closing
+                for fetch in fetches:
+                    fetch.cancel()
+            await asyncio.sleep(source.interval + random.uniform(0, source.jitter))
+
+    async def run(self) -> None:
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await asyncio.gather(*(self._poll(session, source) for source in self.sources))
+
+class _SortedThresholds:
+    """Thresholds of one coin and direction kept in sorted parallel lists."""
+
+    __slots__ = ("keys", "ids")
+
+    def __init__(self):
+        self.keys: List[float] = []
+        self.ids: List[int] = []
+
+    def add(self, threshold: float, alert_id: int) -> None:
+        pos = bisect_right(self.keys, threshold)
+        self.keys.insert(pos, threshold)
+        self.ids.insert(pos, alert_id)
+
+    def remove(self, threshold: float, alert_id: int) -> None:
+        pos = bisect_left(self.keys, threshold)
+        while self.ids[pos] != alert_id:
+            pos += 1
+        del self.keys[pos]
+        del self.ids[pos]
+
+
+class AlertIndex:
+    """Per-coin index of upper and lower price alerts.
+
+    Thresholds are kept sorted, so the alerts crossed by a move from ``last``
+    to ``price`` are found with two binary searches: O(log n + hits) per tick
+    instead of a scan over every alert. Alerts can be added and removed while
+    prices are streaming.
+    """
+
+    def __init__(self):
+        self._upper: Dict[str, _SortedThresholds] = {}
+        self._lower: Dict[str, _SortedThresholds] = {}
+        self.alerts: Dict[int, Tuple[str, str, float, Optional[str]]] = {}
+        self._ids = count(1)
+
+    def add(self, coin: str, threshold: float, direction: str, user: Optional[str] = None) -> int:
+        """Register an alert; direction is 'upper' or 'lower'. Returns its id."""
+        if direction not in ("upper", "lower"):
+            raise ValueError(f"direction must be 'upper' or 'lower', not {direction!r}")
+        alert_id = next(self._ids)
+        side = self._upper if direction == "upper" else self._lower
+        side.setdefault(coin, _SortedThresholds()).add(threshold, alert_id)
+        self.alerts[alert_id] = (coin, direction, threshold, user)
+        return alert_id
+
+    def remove(self, alert_id: int) -> None:
+        coin, direction, threshold, _ = self.alerts.pop(alert_id)
+        side = self._upper if direction == "upper" else self._lower
+        side[coin].remove(threshold, alert_id)
+
+    def crossed(self, coin: str, last: float, price: float) -> List[int]:
+        """Ids of alerts crossed by a move from last to price.
+
+        Upper alerts fire when last < threshold <= price, lower alerts when
+        last > threshold >= price.
+        """
+        if price > last:
+            side = self._upper.get(coin)
+            if side is None:
+                return []
+            return side.ids[bisect_right(side.keys, last):bisect_right(side.keys, price)]
+        if price < last:
+            side = self._lower.get(coin)
+            if side is None:
+                return []
+            return side.ids[bisect_left(side.keys, price):bisect_left(side.keys, last)]
+        return []
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+
+class TickStore:
+    """Append-only price history in per-day segment files.
+
+    Each segment ``ticks-YYYYMMDD.bin`` holds fixed-width little-endian
+    records (float64 timestamp, uint32 coin index, float64 price); coin ids
+    are listed once in ``coins.json``. Segments are read back memory-mapped
+    (requires numpy). The latest ``tail_size`` ticks are also kept in an
+    in-memory ring buffer.
+    """
+
+    def __init__(self, directory: str, tail_size: int = TICK_TAIL_SIZE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._coins_path = self.directory / "coins.json"
+        self.coins: List[str] = json.loads(self._coins_path.read_text()) if self._coins_path.exists() else []
+        self._coin_index = {coin: i for i, coin in enumerate(self.coins)}
+        self.tail: deque = deque(maxlen=tail_size)
+        self._day: Optional[str] = None
+        self._file = None
+
+    def _coin_id(self, coin: str) -> int:
+        """Index of a coin; new coins are listed in memory until ``_save_coins``."""
+        idx = self._coin_index.get(coin)
+        if idx is None:
+            idx = self._coin_index[coin] = len(self.coins)
+            self.coins.append(coin)
+        return idx
+
+    def _save_coins(self) -> None:
+        tmp = self._coins_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.coins))
+        tmp.replace(self._coins_path)
+
+    def append(self, prices: Dict[str, float], ts: Optional[float] = None) -> None:
+        """Record one price per coin, all stamped with ts (default: now)."""
+        ts = time.time() if ts is None else ts
+        day = datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%d")
+        if day != self._day:
+            self.close()
+            self._file = open(self.directory / f"ticks-{day}.bin", "ab")
+            self._day = day
+        known = len(self.coins)
+        ids = [self._coin_id(coin) for coin in prices]
+        if len(self.coins) != known:
+            # One rewrite per batch, before any record refers to the new coins
+            self._save_coins()
+        records = bytearray()
+        for idx, (coin, price) in zip(ids, prices.items()):
+            records += TICK_RECORD.pack(ts, idx, price)
+            self.tail.append((ts, coin, price))
+        self._file.write(records)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+
+    def segments(self, first_day: Optional[str] = None, last_day: Optional[str] = None) -> List[Path]:
+        """Segment files in day order, optionally limited to YYYYMMDD bounds."""
+        paths = sorted(self.directory.glob("ticks-*.bin"))
+        return [p for p in paths
+                if (first_day is None or p.stem[6:] >= first_day) and (last_day is None or p.stem[6:] <= last_day)]
+
+    def read_segment(self, path: Path) -> "np.ndarray":
+        """Memory-map a segment as a structured array with ts, coin and price fields."""
+        if np is None:
+            raise RuntimeError("numpy is required to read ticks. Install with 'pip install numpy'.")
+        self.flush()
+        dtype = np.dtype([("ts", "<f8"), ("coin", "<u4"), ("price", "<f8")])
+        complete = path.stat().st_size // dtype.itemsize  # Ignore a torn final record
+        if complete == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(complete,))
+
+
+def _coin_series(ticks: "np.ndarray", coin_dtype) -> Iterator[Tuple[int, "np.ndarray", Callable[[int], int]]]:
+    """Yield (coin index, prices in time order, position -> segment row) per coin.
+
+    Segments written by ``TickStore.append`` usually repeat the same coins in
+    the same order on every poll; they are reshaped into one column per coin
+    without sorting. Other segments are grouped by coin with a stable sort.
+    """
+    coins = np.asarray(ticks["coin"])
+    width = int(np.searchsorted(ticks["ts"], ticks["ts"][0], "right"))
+    if len(coins) % width == 0 and np.array_equal(coins[width:], coins[:-width]):
+        columns = np.ascontiguousarray(np.asarray(ticks["price"]).reshape(-1, width).T)
+        for j in range(width):
+            yield int(coins[j]), columns[j], lambda k, j=j: k * width + j
+        return
+    order = np.argsort(coins.astype(coin_dtype), kind="stable")
+    coins = coins[order]
+    prices = np.asarray(ticks["price"])[order]
+    bounds = np.concatenate(([0], np.flatnonzero(coins[1:] != coins[:-1]) + 1, [len(coins)]))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        yield int(coins[lo]), prices[lo:hi], lambda k, lo=lo: int(order[lo + k])
+
+
+def replay_ticks(store: TickStore, index: AlertIndex, first_day: Optional[str] = None,
+                 last_day: Optional[str] = None,
+                 on_alert: Optional[Callable[[float, int, float], None]] = None) -> Dict[str, float]:
+    """Push stored ticks through an alert index as fast as possible.
+
+    For each coin in a segment, one vectorized binary search per direction
+    gives the threshold bucket of every price; a change of bucket between
+    consecutive prices is exactly the set of crossed alerts. The index
+    thresholds are snapshotted when the replay starts.
+    ``on_alert(ts, alert_id, price)`` is called for each fired alert in
+    timestamp order. Returns tick, alert and timing counters.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for replay. Install with 'pip install numpy'.")
+    start = time.perf_counter()
+    snapshot: Dict[int, list] = {}
+    for slot, side in ((0, index._upper), (1, index._lower)):
+        for coin, thresholds in side.items():
+            coin_idx = store._coin_index.get(coin)
+            if coin_idx is not None and thresholds.keys:
+                entry = snapshot.setdefault(coin_idx, [None, None])
+                entry[slot] = (np.array(thresholds.keys), np.array(thresholds.ids, dtype=np.int64))
+    coin_dtype = np.uint16 if len(store.coins) <= 1 << 16 else np.uint32  # Enables radix sort
+    last: Dict[int, float] = {}
+    stats = {"ticks": 0, "alerts": 0, "seconds": 0.0}
+    for path in store.segments(first_day, last_day):
+        ticks = store.read_segment(path)
+        if not len(ticks):
+            continue
+        events = []
+        for coin_idx, prices, row_of in _coin_series(ticks, coin_dtype):
+            previous = last.get(coin_idx)
+            last[coin_idx] = float(prices[-1])
+            entry = snapshot.get(coin_idx)
+            if entry is None:
+                continue
+            # seq[0] is the price before this segment, so seq[k + 1] is tick k
+            seq = prices if previous is None else np.concatenate(([previous], prices))
+            offset = 0 if previous is None else 1
+            for slot, side in ((0, "right"), (1, "left")):
+                if entry[slot] is None:
+                    continue
+                keys, ids = entry[slot]
+                bucket = np.searchsorted(keys, seq, side)
+                # Upper alerts fire when the bucket rises, lower when it falls
+                step = np.diff(bucket) if slot == 0 else bucket[:-1] - bucket[1:]
+                moved = np.flatnonzero(step > 0)
+                if not len(moved):
+                    continue
+                stats["alerts"] += int(step[moved].sum())
+                if on_alert is None:
+                    continue
+                for k in moved:
+                    lo, hi = sorted((int(bucket[k]), int(bucket[k + 1])))
+                    row = row_of(int(k) + 1 - offset)
+                    for alert_id in ids[lo:hi]:
+                        events.append((float(ticks["ts"][row]), int(alert_id), float(seq[k + 1])))
+        stats["ticks"] += len(ticks)
+        for ts, alert_id, fired_price in sorted(events):
+            on_alert(ts, alert_id, fired_price)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
 
 class CryptoAlert:
-    def __init__(self, watchlist: Dict[str, Dict[str, float]], interval: int = 60):
+    def __init__(self, watchlist: Dict[str, Dict[str, float]], interval: int = 60,
+                 tick_store: Optional[TickStore] = None):
         self.watchlist = watchlist
         self.interval = interval
         self.last_prices: Dict[str, float] = {}
+        self.tick_store = tick_store
+        self.alerts = AlertIndex()
+        for coin, thresholds in watchlist.items():
+            for direction in ("upper", "lower"):
+                if thresholds.get(direction) is not None:
+                    self.alerts.add(coin, thresholds[direction], direction)
+
+    def add_alert(self, coin: str, threshold: float, direction: str, user: Optional[str] = None) -> int:
+        """Add an alert while running; the coin joins the watchlist if needed."""
+        self.watchlist.setdefault(coin, {})
+        return self.alerts.add(coin, threshold, direction, user)
+
+    def remove_alert(self, alert_id: int) -> None:
+        self.alerts.remove(alert_id)
 
     def fetch_prices(self) -> Dict[str, float]:
         ids = ",".join(self.watchlist.keys())
@@ -24,18 +410,28 @@ class CryptoAlert:
             return {}
 
     def check_thresholds(self, prices: Dict[str, float]) -> None:
+        if self.tick_store is not None:
+            self.tick_store.append(prices)
         for coin, price in prices.items():
-            thresholds = self.watchlist[coin]
             last = self.last_prices.get(coin)
             # Alert only on crossing thresholds
             if last is not None:
-                if thresholds.get("upper") is not None and last < thresholds["upper"] <= price:
-                    print(f"[Alert] {coin} price rose above {thresholds['upper']}$: {price}$")
-                if thresholds.get("lower") is not None and last > thresholds["lower"] >= price:
-                    print(f"[Alert] {coin} price fell below {thresholds['lower']}$: {price}$")
+                for alert_id in self.alerts.crossed(coin, last, price):
+                    self.notify(alert_id, price)
             self.last_prices[coin] = price
 
+    def notify(self, alert_id: int, price: float) -> None:
+        coin, direction, threshold, user = self.alerts.alerts[alert_id]
+        prefix = f"[Alert] @{user} " if user else "[Alert] "
+        if direction == "upper":
+            print(f"{prefix}{coin} price rose above {threshold}$: {price}$")
+        else:
+            print(f"{prefix}{coin} price fell below {threshold}$: {price}$")
+
     def run(self) -> None:
+        if aiohttp is not None:
+            asyncio.run(self.run_async())
+            return
         print("Starting CryptoAlert...")
         while True:
             prices = self.fetch_prices()
@@ -43,18 +439,180 @@ class CryptoAlert:
                 self.check_thresholds(prices)
             time.sleep(self.interval)
 
+    async def run_async(self, sources: Optional[List[PriceSource]] = None) -> None:
+        """Poll sources with AsyncPricePoller and feed check_thresholds from a queue.
+
+        Defaults to one CoinGecko source for the whole watchlist, which
+        picks up coins added with ``add_alert`` on its next poll.
+        """
+        print("Starting CryptoAlert (async)...")
+        sources = sources or [PriceSource("coingecko", lambda: list(self.watchlist), interval=self.interval,
+                                          jitter=self.interval * 0.1)]
+        queue: asyncio.Queue = asyncio.Queue()
+        poller = asyncio.create_task(AsyncPricePoller(sources, queue).run())
+        try:
+            while True:
+                get = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait({get, poller}, return_when=asyncio.FIRST_COMPLETED)
+                if poller in done:
+                    get.cancel()
+                    poller.result()  # Propagate poller failures
+                    return
+                prices = get.result()
+                self.check_thresholds({coin: p for coin, p in prices.items() if coin in self.watchlist})
+        finally:
+            poller.cancel()
+
+async def start_mock_price_server(latency: float = 0.0, stall: float = 0.0, port: int = 0):
+    """Local CoinGecko ``simple/price`` endpoint for benchmarks and tests.
+
+    Every coin's price follows its own random walk. Requests take
+    ``latency`` seconds, and the fraction ``stall`` of them ten times as
+    long. Returns (runner, url, counters); stop with ``await runner.cleanup()``.
+    """
+    counters = {"requests": 0, "ids": 0}
+    prices: Dict[str, float] = {}
+
+    async def simple_price(request):
+        ids = [coin for coin in request.query.get("ids", "").split(",") if coin]
+        currency = request.query.get("vs_currencies", "usd")
+        counters["requests"] += 1
+        counters["ids"] += len(ids)
+        delay = latency * 10 if stall and random.random() < stall else latency
+        if delay:
+            await asyncio.sleep(delay)
+        body = {}
+        for coin in ids:
+            prices[coin] = prices.get(coin, 100.0) * (1 + random.gauss(0, 0.001))
+            body[coin] = {currency: prices[coin]}
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get("/api/v3/simple/price", simple_price)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/api/v3/simple/price", counters
+
+
+async def benchmark_poller(n_coins: int = 5000, n_sources: int = 4, duration: float = 5.0,
+                           interval: float = 1.0, latency: float = 0.05, stall: float = 0.1) -> dict:
+    """Poll n_coins split over n_sources sources from the mock price server for ``duration`` seconds.
+
+    Reports requests, queued batches and price updates per second.
+    """
+    if aiohttp is None:
+        raise RuntimeError("aiohttp is required for async polling. Install with 'pip install aiohttp'.")
+    runner, url, counters = await start_mock_price_server(latency, stall)
+    coins = [f"coin-{i}" for i in range(n_coins)]
+    sources = [PriceSource(f"mock-{i}", coins[i::n_sources], url, interval, jitter=interval * 0.1)
+               for i in range(n_sources)]
+    queue: asyncio.Queue = asyncio.Queue()
+    poller = asyncio.create_task(AsyncPricePoller(sources, queue).run())
+    batches = updates = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            remaining = start + duration - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                prices = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batches += 1
+            updates += len(prices)
+        elapsed = time.perf_counter() - start
+    finally:
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+        await runner.cleanup()
+    return {
+        "batches_per_poll": sum(len(source.batches) for source in sources),
+        "requests": counters["requests"],
+        "batches": batches,
+        "updates": updates,
+        "seconds": elapsed,
+        "updates_per_second": updates / elapsed,
+    }
+
+
+def benchmark_alert_index(n_alerts: int = 500_000, n_ticks: int = 1_000_000, n_coins: int = 500,
+                          seed: int = 0) -> None:
+    """Replay random-walk ticks against randomly placed alerts and report throughput."""
+    rng = random.Random(seed)
+    coins = [f"coin-{i}" for i in range(n_coins)]
+    index = AlertIndex()
+    start = time.perf_counter()
+    for _ in range(n_alerts):
+        index.add(rng.choice(coins), rng.uniform(50, 150), rng.choice(("upper", "lower")))
+    build_s = time.perf_counter() - start
+    ticks = [(rng.choice(coins), rng.gauss(0, 0.5)) for _ in range(n_ticks)]
+    last = {coin: 100.0 for coin in coins}
+    hits = 0
+    start = time.perf_counter()
+    for coin, step in ticks:
+        prev = last[coin]
+        price = prev + step
+        hits += len(index.crossed(coin, prev, price))
+        last[coin] = price
+    replay_s = time.perf_counter() - start
+    print(f"Indexed {n_alerts} alerts over {n_coins} coins in {build_s:.2f}s")
+    print(f"Replayed {n_ticks} ticks in {replay_s:.2f}s ({n_ticks / replay_s:,.0f} ticks/s), {hits} alerts fired")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Crypto price threshold alerts.")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark the alert index and exit.")
+    parser.add_argument("--alerts", type=int, default=500_000, help="Alerts used by --benchmark.")
+    parser.add_argument("--ticks", type=int, default=1_000_000, help="Ticks replayed by --benchmark.")
+    parser.add_argument("--benchmark-poller", action="store_true",
+                        help="Benchmark the async poller against a local mock price server and exit.")
+    parser.add_argument("--coins", type=int, default=5000, help="Coins polled by --benchmark-poller.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds --benchmark-poller runs.")
+    parser.add_argument("--store", metavar="DIR", help="Record every fetched price in a tick store.")
+    parser.add_argument("--replay", metavar="DIR", help="Replay a tick store through the alerts and exit.")
+    parser.add_argument("--from", dest="first_day", metavar="YYYYMMDD", help="First day replayed.")
+    parser.add_argument("--to", dest="last_day", metavar="YYYYMMDD", help="Last day replayed.")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark_alert_index(args.alerts, args.ticks)
+        return
+    if args.benchmark_poller:
+        result = asyncio.run(benchmark_poller(args.coins, duration=args.duration))
+        print(f"Polled {args.coins} coins in {result['batches_per_poll']} batches per round: "
+              f"{result['requests']} requests, {result['batches']} batches queued, "
+              f"{result['updates_per_second']:,.0f} price updates/s over {result['seconds']:.1f}s")
+        return
     # Sample watchlist: coin IDs from CoinGecko, thresholds in USD
     sample_watchlist = {
         "bitcoin": {"upper": 30000, "lower": 25000},
         "ethereum": {"upper": 2000, "lower": 1500}
     }
+    if args.replay:
+        alert = CryptoAlert(sample_watchlist)
+
+        def report(ts: float, alert_id: int, price: float) -> None:
+            print(datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S "), end="")
+            alert.notify(alert_id, price)
+
+        stats = replay_ticks(TickStore(args.replay), alert.alerts, args.first_day, args.last_day, report)
+        rate = stats["ticks"] / stats["seconds"] if stats["seconds"] else 0.0
+        print(f"Replayed {stats['ticks']} ticks in {stats['seconds']:.2f}s ({rate:,.0f} ticks/s), "
+              f"{stats['alerts']} alerts fired")
+        return
     # Interval in seconds; adjust as needed
-    alert = CryptoAlert(sample_watchlist, interval=30)
+    store = TickStore(args.store) if args.store else None
+    alert = CryptoAlert(sample_watchlist, interval=30, tick_store=store)
     try:
         alert.run()
     except KeyboardInterrupt:
         print("\nCryptoAlert stopped by user.")
+    finally:
+        if store is not None:
+            store.close()
 
 if __name__ == "__main__":
     main()
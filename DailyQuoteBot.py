@@ -3,35 +3,215 @@ import logging
 import random
 import asyncio
 import datetime
+import json
+import time
+import threading
+import heapq
+import sqlite3
+import statistics
+import argparse
+from collections import deque
+from email.utils import formatdate
+from itertools import count
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
 import requests
 from telegram import Bot
 from telegram.error import TelegramError
 import discord
 from discord.ext import tasks, commands
 
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:
+    aiohttp = None
+
 # Configure basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 QUOTE_API_URL = 'https://type.fit/api/quotes'
+QUOTE_CACHE_PATH = Path(os.getenv('QUOTE_CACHE_PATH', Path.home() / '.cache' / 'dailyquotebot' / 'quotes.json'))
+QUOTE_CACHE_TTL = float(os.getenv('QUOTE_CACHE_TTL', 24 * 3600))
+QUOTE_NO_REPEAT = int(os.getenv('QUOTE_NO_REPEAT', 30))
+SUBSCRIBERS_PATH = Path(os.getenv('QUOTE_SUBSCRIBERS', QUOTE_CACHE_PATH.parent / 'subscribers.sqlite3'))
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org')
+DISCORD_API_BASE = os.getenv('DISCORD_API_BASE', 'https://discord.com/api/v10')
+# Sustained messages per second and burst size per platform
+PLATFORM_RATES = {'telegram': (30.0, 30), 'discord': (50.0, 50)}
+SEND_WORKERS = 64
+MAX_SEND_RETRIES = 5
+STORE_POLL_INTERVAL = 10.0  # Seconds between checks for subscriber changes
+FALLBACK_QUOTE = ("Stay positive and keep moving forward!", "Unknown")
 
-def fetch_random_quote() -> str:
-    """Retrieve a random motivational quote from a public API."""
-    try:
-        response = requests.get(QUOTE_API_URL, timeout=10)
-        response.raise_for_status()
-        quotes = response.json()
-        quote_obj = random.choice(quotes)
-        text = quote_obj.get('text', '').strip()
-        author = quote_obj.get('author', 'Unknown')
+
+class QuoteCorpus:
+    """Quote list cached on disk and refreshed with conditional requests.
+
+    The corpus is loaded once from ``path``; ``refresh`` revalidates it
+    against the API with ETag/If-Modified-Since, so an unchanged list costs
+    a 304 instead of a full download. When the API is unreachable the cached
+    quotes keep being served. ``pick`` avoids repeating any of the last
+    ``no_repeat`` quotes.
+    """
+
+    def __init__(self, path: Path = QUOTE_CACHE_PATH, url: str = QUOTE_API_URL,
+                 ttl: float = QUOTE_CACHE_TTL, no_repeat: int = QUOTE_NO_REPEAT):
+        self.path = Path(path)
+        self.url = url
+        self.ttl = ttl
+        self.no_repeat = max(0, no_repeat)
+        self.quotes: List[Tuple[str, str]] = []
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at = 0.0
+        self._recent: Deque[int] = deque()
+        self._recent_set: Set[int] = set()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        """Load the cached corpus, if any, from disk."""
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        self.quotes = [tuple(q) for q in data.get('quotes', [])]
+        self.etag = data.get('etag')
+        self.last_modified = data.get('last_modified')
+        self.fetched_at = data.get('fetched_at', 0.0)
+        for index in data.get('recent', []):
+            if 0 <= index < len(self.quotes):
+                self._remember(index)
+
+    def save(self) -> None:
+        """Write the corpus atomically so a crash never leaves a torn cache."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with self._lock:
+            data = {
+                'etag': self.etag,
+                'last_modified': self.last_modified,
+                'fetched_at': self.fetched_at,
+                'recent': list(self._recent),
+                'quotes': self.quotes,
+            }
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+    def is_stale(self) -> bool:
+        return not self.quotes or time.time() - self.fetched_at >= self.ttl
+
+    def refresh(self) -> bool:
+        """Revalidate the corpus against the API. Returns True if it changed.
+
+        Blocking; call it through ``asyncio.to_thread`` from async code.
+        """
+        headers = {}
+        if self.quotes and self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.quotes and self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        try:
+            response = requests.get(self.url, headers=headers, timeout=10)
+            if response.status_code == 304:
+                self.fetched_at = time.time()
+                self.save()
+                logger.info('Quote corpus unchanged')
+                return False
+            response.raise_for_status()
+            quotes = [
+                ((q.get('text') or '').strip(), q.get('author') or 'Unknown')
+                for q in response.json()
+            ]
+        except Exception as e:
+            logger.error(f'Failed to refresh quotes, using {len(self.quotes)} cached: {e}')
+            return False
+        quotes = [q for q in quotes if q[0]]
+        if not quotes:
+            logger.error('Quote API returned no quotes, keeping cached corpus')
+            return False
+        with self._lock:
+            self.quotes = quotes
+            self._recent.clear()
+            self._recent_set.clear()
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified') or formatdate(usegmt=True)
+        self.fetched_at = time.time()
+        self.save()
+        logger.info(f'Quote corpus refreshed: {len(quotes)} quotes')
+        return True
+
+    async def refresh_forever(self) -> None:
+        """Refresh in a worker thread whenever the TTL expires."""
+        while True:
+            if self.is_stale():
+                await asyncio.to_thread(self.refresh)
+            wait = max(60.0, self.fetched_at + self.ttl - time.time())
+            await asyncio.sleep(wait)
+
+    def _remember(self, index: int) -> None:
+        self._recent.append(index)
+        self._recent_set.add(index)
+
+    def pick(self) -> Tuple[str, str]:
+        """Return a random (text, author) without repeating recent picks.
+
+        The window is capped at half the corpus, so rejection sampling needs
+        at most two draws on average.
+        """
+        with self._lock:
+            if not self.quotes:
+                return FALLBACK_QUOTE
+            window = min(self.no_repeat, len(self.quotes) // 2)
+            while len(self._recent) > max(window - 1, 0):
+                self._recent_set.discard(self._recent.popleft())
+            index = random.randrange(len(self.quotes))
+            while index in self._recent_set:
+                index = random.randrange(len(self.quotes))
+            if window:
+                self._remember(index)
+            return self.quotes[index]
+
+    def format_quote(self) -> str:
+        text, author = self.pick()
         return f"\"{text}\" - {author}"
-    except Exception as e:
-        logger.error(f'Failed to fetch quote: {e}')
-        return "Stay positive and keep moving forward!"
+
+
+_corpus: Optional[QuoteCorpus] = None
+
+
+def get_corpus() -> QuoteCorpus:
+    """Shared corpus, loaded from disk on first use."""
+    global _corpus
+    if _corpus is None:
+        _corpus = QuoteCorpus()
+    return _corpus
+
+
+def fetch_random_quote() -> str:
+    """Return a random motivational quote from the cached corpus.
+
+    Only downloads (blocking) if there is no cache at all yet; otherwise
+    refreshing is left to ``QuoteCorpus.refresh_forever``.
+    """
+    corpus = get_corpus()
+    if not corpus.quotes:
+        corpus.refresh()
+    quote = corpus.format_quote()
+    corpus.save()
+    return quote
+
+_telegram_bots: Dict[str, Bot] = {}
+
 
 async def send_telegram_message(token: str, chat_id: str, message: str):
-    """Send a message via Telegram Bot API."""
-    bot = Bot(token=token)
+    """Send a message via Telegram Bot API, reusing one Bot per token."""
+    bot = _telegram_bots.get(token)
+    if bot is None:
+        bot = _telegram_bots[token] = Bot(token=token)
     try:
         await bot.send_message(chat_id=chat_id, text=message)
         logger.info('Telegram message sent')
@@ -55,7 +235,7 @@ class DiscordQuoteBot(commands.Cog):
         if channel is None:
             logger.error('Discord channel not found')
             return
-        quote = fetch_random_quote()
+        quote = await asyncio.to_thread(fetch_random_quote)
         try:
             await channel.send(quote)
             logger.info('Discord quote sent')
@@ -71,6 +251,391 @@ class DiscordQuoteBot(commands.Cog):
         logger.info(f'Waiting {wait_seconds:.0f} seconds to start Discord daily task')
         await asyncio.sleep(wait_seconds)
 
+class Subscriber(NamedTuple):
+    platform: str
+    target: str
+    tz: str = 'UTC'
+    send_at: str = '09:00'
+
+
+class SubscriberStore:
+    """Subscribers kept in SQLite, one row per (platform, chat or channel)."""
+
+    def __init__(self, path=SUBSCRIBERS_PATH):
+        if str(path) != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS subscribers ('
+            'platform TEXT NOT NULL, target TEXT NOT NULL, tz TEXT NOT NULL, send_at TEXT NOT NULL, '
+            'PRIMARY KEY (platform, target))'
+        )
+
+    def add(self, subscriber: Subscriber) -> None:
+        if subscriber.platform not in PLATFORM_RATES:
+            raise ValueError(f'Unknown platform: {subscriber.platform}')
+        ZoneInfo(subscriber.tz)
+        datetime.datetime.strptime(subscriber.send_at, '%H:%M')
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO subscribers VALUES (?, ?, ?, ?)', subscriber)
+
+    def add_many(self, subscribers: List[Subscriber]) -> None:
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO subscribers VALUES (?, ?, ?, ?)', subscribers)
+
+    def remove(self, platform: str, target: str) -> bool:
+        with self.conn:
+            cur = self.conn.execute('DELETE FROM subscribers WHERE platform = ? AND target = ?', (platform, target))
+        return cur.rowcount > 0
+
+    def __iter__(self) -> Iterator[Subscriber]:
+        for row in self.conn.execute('SELECT platform, target, tz, send_at FROM subscribers'):
+            yield Subscriber(*row)
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM subscribers').fetchone()[0]
+
+    def data_version(self) -> int:
+        """Changes whenever another connection (e.g. ``--subscribe``) commits to the store."""
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+
+def next_delivery(subscriber: Subscriber, after: float) -> float:
+    """Epoch time of the subscriber's next local ``send_at`` strictly after ``after``."""
+    tz = ZoneInfo(subscriber.tz)
+    hour, minute = map(int, subscriber.send_at.split(':'))
+    local = datetime.datetime.fromtimestamp(after, tz)
+    day = local.date()
+    while True:
+        target = datetime.datetime.combine(day, datetime.time(hour, minute), tzinfo=tz)
+        if target.timestamp() > after:
+            return target.timestamp()
+        day += datetime.timedelta(days=1)
+
+
+class TokenBucket:
+    """Async token bucket; ``pause`` blocks it after a 429 from the platform."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class _RetryLater(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PlatformClient:
+    """Sends messages for one platform over a shared keep-alive session."""
+
+    def __init__(self, platform: str, token: str, session: "aiohttp.ClientSession",
+                 base_url: Optional[str] = None, rate: Optional[Tuple[float, int]] = None):
+        self.platform = platform
+        self.token = token
+        self.session = session
+        self.base_url = (base_url or (TELEGRAM_API_BASE if platform == 'telegram' else DISCORD_API_BASE)).rstrip('/')
+        self.bucket = TokenBucket(*(rate or PLATFORM_RATES[platform]))
+
+    def _request(self, target: str, text: str) -> Tuple[str, dict, dict]:
+        if self.platform == 'telegram':
+            return f'{self.base_url}/bot{self.token}/sendMessage', {}, {'chat_id': target, 'text': text}
+        headers = {'Authorization': f'Bot {self.token}'}
+        return f'{self.base_url}/channels/{target}/messages', headers, {'content': text}
+
+    async def send(self, target: str, text: str) -> None:
+        """Send one message. Raises _RetryLater for transient failures."""
+        await self.bucket.acquire()
+        url, headers, payload = self._request(target, text)
+        try:
+            async with self.session.post(url, json=payload, headers=headers) as resp:
+                if resp.status < 300:
+                    await resp.read()
+                    return
+                try:
+                    body = await resp.json(content_type=None)
+                except ValueError:
+                    body = {}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _RetryLater(f'{type(e).__name__}: {e}')
+        body = body if isinstance(body, dict) else {}
+        if resp.status == 429:
+            # Telegram: parameters.retry_after (int s); Discord: retry_after (float s)
+            retry_after = float(body.get('retry_after') or body.get('parameters', {}).get('retry_after') or 1)
+            self.bucket.pause(retry_after)
+            raise _RetryLater('rate limited', retry_after)
+        if resp.status >= 500:
+            raise _RetryLater(f'HTTP {resp.status}')
+        raise RuntimeError(f'HTTP {resp.status}: {body.get("description") or body.get("message") or body}')
+
+
+class Broadcaster:
+    """Delivers the daily quote to every subscriber at their local time.
+
+    Deliveries sit in a heap keyed on due time (a timer wheel with one slot
+    per pending send); the scheduler hands due ones to a pool of worker tasks
+    that send through per-platform clients and token buckets. Transient
+    failures go back on the heap with backoff, honouring ``retry_after``.
+    ``sync`` applies subscriber changes: heap entries of removed or
+    rescheduled subscribers are dropped when they come due.
+    """
+
+    def __init__(self, clients: Dict[str, PlatformClient],
+                 compose: Optional[Callable[[Subscriber, datetime.date], str]] = None,
+                 workers: int = SEND_WORKERS, max_retries: int = MAX_SEND_RETRIES, repeat: bool = True):
+        self.clients = clients
+        self.compose = compose or self._quote_of_the_day
+        self.workers = workers
+        self.max_retries = max_retries
+        self.repeat = repeat
+        # (due, seq, attempt, scheduled, subscriber, generation)
+        self._heap: List[Tuple[float, int, int, float, Subscriber, int]] = []
+        # (platform, target) -> (subscriber, generation of its live heap entry)
+        self._active: Dict[Tuple[str, str], Tuple[Subscriber, int]] = {}
+        self._seq = count()
+        self._wake = asyncio.Event()
+        self._pending = 0
+        self._done = asyncio.Event()
+        self._quotes: Dict[datetime.date, str] = {}
+        self.stats = {'sent': 0, 'failed': 0, 'retries': 0}
+        self.lags: List[float] = []
+
+    def _quote_of_the_day(self, subscriber: Subscriber, day: datetime.date) -> str:
+        # Everyone gets the same quote on the same local date
+        if day not in self._quotes:
+            self._quotes[day] = get_corpus().format_quote()
+        return self._quotes[day]
+
+    def schedule(self, subscriber: Subscriber, due: Optional[float] = None) -> None:
+        if due is None:
+            due = next_delivery(subscriber, time.time())
+        generation = next(self._seq)
+        self._active[subscriber[:2]] = (subscriber, generation)
+        self._push(due, 0, due, subscriber, generation)
+        self._pending += 1
+
+    def schedule_all(self, store: SubscriberStore) -> None:
+        self.sync(store)
+
+    def sync(self, store: SubscriberStore) -> Tuple[int, int]:
+        """Schedule new or changed subscribers and cancel removed ones; returns (added, removed)."""
+        current = {subscriber[:2]: subscriber for subscriber in store if subscriber.platform in self.clients}
+        removed = [key for key in self._active if key not in current]
+        for key in removed:
+            del self._active[key]
+        added = [subscriber for key, subscriber in current.items()
+                 if key not in self._active or self._active[key][0] != subscriber]
+        for subscriber in added:
+            self.schedule(subscriber)
+        return len(added), len(removed)
+
+    def _cancelled(self, subscriber: Subscriber, generation: int) -> bool:
+        return self._active.get(subscriber[:2]) != (subscriber, generation)
+
+    def _drop(self) -> None:
+        self._pending -= 1
+        if self._pending == 0:
+            self._done.set()
+
+    def _push(self, due: float, attempt: int, scheduled: float, subscriber: Subscriber, generation: int) -> None:
+        heapq.heappush(self._heap, (due, next(self._seq), attempt, scheduled, subscriber, generation))
+        self._wake.set()
+
+    def _finish(self, scheduled: float, subscriber: Subscriber, generation: int) -> None:
+        if self.repeat and not self._cancelled(subscriber, generation):
+            due = next_delivery(subscriber, scheduled)
+            self._push(due, 0, due, subscriber, generation)
+            return
+        self._drop()
+
+    async def _scheduler(self, queue: "asyncio.Queue") -> None:
+        while True:
+            self._wake.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if self._cancelled(entry[4], entry[5]):
+                    self._drop()
+                    continue
+                await queue.put(entry)
+            delay = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self, queue: "asyncio.Queue") -> None:
+        while True:
+            due, _, attempt, scheduled, subscriber, generation = await queue.get()
+            client = self.clients[subscriber.platform]
+            day = datetime.datetime.fromtimestamp(scheduled, ZoneInfo(subscriber.tz)).date()
+            try:
+                await client.send(subscriber.target, self.compose(subscriber, day))
+            except _RetryLater as e:
+                if attempt < self.max_retries:
+                    self.stats['retries'] += 1
+                    backoff = e.retry_after if e.retry_after is not None else min(60.0, 2 ** attempt)
+                    self._push(time.time() + backoff, attempt + 1, scheduled, subscriber, generation)
+                    continue
+                logger.error(f'Giving up on {subscriber.platform}:{subscriber.target}: {e}')
+                self.stats['failed'] += 1
+            except Exception as e:
+                logger.error(f'Send to {subscriber.platform}:{subscriber.target} failed: {e}')
+                self.stats['failed'] += 1
+            else:
+                self.stats['sent'] += 1
+                self.lags.append(time.time() - scheduled)
+            finally:
+                queue.task_done()
+            self._finish(scheduled, subscriber, generation)
+
+    async def run(self) -> None:
+        """Deliver until stopped, or until every send finished when ``repeat`` is off."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        tasks_ = [asyncio.create_task(self._scheduler(queue))]
+        tasks_ += [asyncio.create_task(self._worker(queue)) for _ in range(self.workers)]
+        try:
+            if self.repeat:
+                await asyncio.gather(*tasks_)
+            else:
+                if self._pending:
+                    await self._done.wait()
+        finally:
+            for task in tasks_:
+                task.cancel()
+            await asyncio.gather(*tasks_, return_exceptions=True)
+
+
+def _client_session(workers: int) -> "aiohttp.ClientSession":
+    connector = aiohttp.TCPConnector(limit=workers, keepalive_timeout=300)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30))
+
+
+async def run_broadcaster(store: SubscriberStore, workers: int = SEND_WORKERS) -> None:
+    """Serve every subscriber in the store with one client per platform."""
+    if aiohttp is None:
+        raise RuntimeError("aiohttp is required for broadcasting. Install with 'pip install aiohttp'.")
+    tokens = {'telegram': os.getenv('TELEGRAM_TOKEN'), 'discord': os.getenv('DISCORD_TOKEN')}
+    async with _client_session(workers) as session:
+        clients = {name: PlatformClient(name, token, session) for name, token in tokens.items() if token}
+        if not clients:
+            logger.error('Set TELEGRAM_TOKEN and/or DISCORD_TOKEN to broadcast')
+            return
+        broadcaster = Broadcaster(clients, workers=workers)
+        broadcaster.sync(store)
+        logger.info(f'Broadcasting to {broadcaster._pending} subscribers')
+        await asyncio.gather(broadcaster.run(), get_corpus().refresh_forever(), _watch_store(store, broadcaster))
+
+
+async def _watch_store(store: SubscriberStore, broadcaster: Broadcaster,
+                       interval: float = STORE_POLL_INTERVAL) -> None:
+    """Apply subscribes and unsubscribes made while the broadcaster runs."""
+    version = store.data_version()
+    while True:
+        await asyncio.sleep(interval)
+        current = store.data_version()
+        if current != version:
+            version = current
+            added, removed = broadcaster.sync(store)
+            logger.info(f'Subscribers changed: {added} added or rescheduled, {removed} removed')
+
+
+async def start_mock_endpoints(latency: float = 0.0, throttle: float = 0.0, port: int = 0):
+    """Local Telegram and Discord send endpoints for benchmarks.
+
+    ``throttle`` is the fraction of requests answered with a 429. Returns
+    (runner, base_url, counters); stop with ``await runner.cleanup()``.
+    """
+    counters = {'requests': 0, 'throttled': 0}
+
+    async def reply(request, platform: str):
+        counters['requests'] += 1
+        await request.read()
+        if latency:
+            await asyncio.sleep(latency)
+        if throttle and random.random() < throttle:
+            counters['throttled'] += 1
+            if platform == 'telegram':
+                body = {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 1}}
+            else:
+                body = {'message': 'You are being rate limited.', 'retry_after': 0.25, 'global': False}
+            return web.json_response(body, status=429)
+        return web.json_response({'ok': True} if platform == 'telegram' else {'id': '0'})
+
+    app = web.Application()
+    app.router.add_post('/bot{token}/sendMessage', lambda r: reply(r, 'telegram'))
+    app.router.add_post('/channels/{channel}/messages', lambda r: reply(r, 'discord'))
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}', counters
+
+
+async def benchmark_broadcast(subscribers: int = 5000, spread: float = 2.0, workers: int = SEND_WORKERS,
+                              rate: Optional[float] = None, latency: float = 0.0, throttle: float = 0.0) -> dict:
+    """Broadcast to synthetic subscribers due within ``spread`` seconds via mock endpoints.
+
+    ``rate`` overrides the per-platform messages per second (0 disables
+    the buckets). Reports throughput and delivery lag behind the due time.
+    """
+    if aiohttp is None:
+        raise RuntimeError("aiohttp is required for broadcasting. Install with 'pip install aiohttp'.")
+    runner, base_url, counters = await start_mock_endpoints(latency, throttle)
+    try:
+        async with _client_session(workers) as session:
+            clients = {
+                name: PlatformClient(name, 'bench', session, base_url,
+                                     (rate, max(1, int(rate))) if rate is not None else None)
+                for name in PLATFORM_RATES
+            }
+            broadcaster = Broadcaster(clients, compose=lambda s, d: 'Benchmark quote',
+                                      workers=workers, max_retries=20, repeat=False)
+            zones = ['UTC', 'Europe/Berlin', 'America/New_York', 'Asia/Kolkata', 'Asia/Tokyo']
+            start = time.time()
+            for i in range(subscribers):
+                subscriber = Subscriber('telegram' if i % 2 else 'discord', str(i), zones[i % len(zones)])
+                broadcaster.schedule(subscriber, start + spread * i / subscribers)
+            await broadcaster.run()
+            elapsed = time.time() - start
+    finally:
+        await runner.cleanup()
+    lags = sorted(broadcaster.lags) or [0.0]
+    return {
+        **broadcaster.stats,
+        'requests': counters['requests'],
+        'throttled': counters['throttled'],
+        'seconds': elapsed,
+        'per_second': broadcaster.stats['sent'] / elapsed if elapsed else 0.0,
+        'lag_p50': statistics.median(lags),
+        'lag_p95': lags[int(0.95 * (len(lags) - 1))],
+        'lag_max': lags[-1],
+    }
+
+
 async def main():
     # Load configuration from environment variables
     telegram_token = os.getenv('TELEGRAM_TOKEN')
@@ -98,17 +663,55 @@ async def main():
             wait_seconds = (target - now).total_seconds()
             logger.info(f'Waiting {wait_seconds:.0f} seconds for next Telegram quote')
             await asyncio.sleep(wait_seconds)
-            quote = fetch_random_quote()
+            quote = await asyncio.to_thread(fetch_random_quote)
             await send_telegram_message(telegram_token, telegram_chat_id, quote)
 
-    # Run both bots concurrently
+    # Run both bots concurrently, refreshing the quote cache in the background
     await asyncio.gather(
         discord_bot.start(discord_token),
-        telegram_daily_task()
+        telegram_daily_task(),
+        get_corpus().refresh_forever()
     )
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Daily motivational quotes for Telegram and Discord.')
+    parser.add_argument('--broadcast', action='store_true',
+                        help='Deliver to every subscriber in the store at their local time.')
+    parser.add_argument('--subscribers', default=SUBSCRIBERS_PATH, help='Subscriber database.')
+    parser.add_argument('--subscribe', nargs=2, metavar=('PLATFORM', 'TARGET'),
+                        help='Add a telegram chat id or discord channel id and exit.')
+    parser.add_argument('--unsubscribe', nargs=2, metavar=('PLATFORM', 'TARGET'), help='Remove a subscriber and exit.')
+    parser.add_argument('--tz', default='UTC', help='IANA time zone for --subscribe (default: UTC).')
+    parser.add_argument('--at', default='09:00', metavar='HH:MM', help='Local delivery time for --subscribe.')
+    parser.add_argument('--workers', type=int, default=SEND_WORKERS, help='Concurrent sends.')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Broadcast to N synthetic subscribers via mock endpoints.')
+    parser.add_argument('--spread', type=float, default=2.0, help='Seconds over which benchmark sends fall due.')
+    parser.add_argument('--rate', type=float, help='Benchmark messages per second per platform (0: unlimited).')
+    parser.add_argument('--mock-latency', type=float, default=0.0, help='Seconds the mock endpoints wait per request.')
+    parser.add_argument('--mock-throttle', type=float, default=0.0, help='Fraction of mock requests answered with 429.')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
     try:
-        asyncio.run(main())
+        if args.benchmark:
+            result = asyncio.run(benchmark_broadcast(args.benchmark, args.spread, args.workers, args.rate,
+                                                     args.mock_latency, args.mock_throttle))
+            print(f"{result['sent']} sent, {result['failed']} failed, {result['retries']} retries "
+                  f"({result['throttled']} throttled) in {result['seconds']:.2f}s = {result['per_second']:.0f} msg/s")
+            print(f"Delivery lag p50 {result['lag_p50'] * 1000:.1f}ms, p95 {result['lag_p95'] * 1000:.1f}ms, "
+                  f"max {result['lag_max'] * 1000:.1f}ms")
+        elif args.subscribe or args.unsubscribe:
+            store = SubscriberStore(args.subscribers)
+            if args.subscribe:
+                store.add(Subscriber(*args.subscribe, tz=args.tz, send_at=args.at))
+            elif not store.remove(*args.unsubscribe):
+                logger.error('No such subscriber')
+            logger.info(f'{len(store)} subscribers')
+        elif args.broadcast:
+            asyncio.run(run_broadcaster(SubscriberStore(args.subscribers), args.workers))
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info('Shutdown requested by user')
@@ -1,6 +1,25 @@
-	import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime
+	import re
+import os
+import csv
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+# Distinct descriptions whose category is remembered between chunks
+CATEGORY_CACHE_SIZE = 200_000
+# Bump when chart styling changes so cached charts are re-rendered
+CHART_VERSION = 1
+# Column types of bank statement exports
+STATEMENT_DTYPES = {'Description': 'string', 'Amount': 'float64', 'Account': 'string'}
 
 # Simple keyword‑based categorization map
 CATEGORY_MAP = {
@@ -33,31 +52,406 @@ def categorize(description: str) -> str:
             return cat
     return 'Other'
 
-def preprocess(df: pd.DataFrame) -> pd.DataFrame:
+def load_rules(path: str) -> list:
+    """Read categorization rules from a CSV or JSON file.
+
+    CSV needs ``keyword,category`` columns and may add ``priority`` and
+    ``regex``; JSON is a list of objects with the same keys. Higher
+    priority wins; equal priorities keep file order.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = json.load(f) if path.endswith('.json') else list(csv.DictReader(f))
+    rules = []
+    for row in rows:
+        regex = row.get('regex', False)
+        if isinstance(regex, str):
+            regex = regex.strip().lower() in ('1', 'true', 'yes')
+        rules.append((row['keyword'], row['category'], float(row.get('priority') or 0), regex))
+    return rules
+
+def _trie_regex(words) -> str:
+    """Regex source for any of ``words`` as a character trie, preferring the longest."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = None
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return body + '?' if len(body) == 1 else '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+class Categorizer:
+    """Vectorized, cached replacement for calling ``categorize`` per row.
+
+    Plain keywords are compiled into one trie-shaped regex inside a
+    lookahead, so a single ``findall`` over the lowercased description
+    yields the longest keyword starting at each position; keywords inside
+    a hit are implied by it. The hit implying the highest-priority rule
+    wins, exactly like the ``categorize`` loop. Regex rules are searched
+    one by one, and only while they outrank the best keyword found. Only
+    unique descriptions are scanned, and their categories are kept in an
+    LRU cache across calls because merchants repeat heavily.
+    """
+
+    def __init__(self, rules: list = None, default: str = 'Other', cache_size: int = CATEGORY_CACHE_SIZE):
+        builtin = [(keyword, cat, 0.0, False) for keyword, cat in CATEGORY_MAP.items()]
+        ordered = sorted(enumerate((rules or []) + builtin), key=lambda r: (-r[1][2], r[0]))
+        self.rules = [rule for _, rule in ordered]
+        self.default = default
+        # Sorted so groupby output orders categories as it did for strings
+        self.categories = sorted({cat for _, cat, _, _ in self.rules} | {default})
+        # Lowercased keyword -> index of its highest-priority rule
+        self._keywords = {}
+        self._regex_rules = []
+        for i, (keyword, _, _, regex) in enumerate(self.rules):
+            if regex:
+                self._regex_rules.append((i, re.compile(keyword, re.I | re.S)))
+            else:
+                self._keywords.setdefault(keyword.lower(), i)
+        self._scanner = re.compile('(?=(' + _trie_regex(self._keywords) + '))') if self._keywords else None
+        # Scanner hit -> best rule among the keywords it contains
+        self._hit_rules = {}
+        self._default_code = self.categories.index(default)
+        # One past the last rule means no rule matched
+        self._rule_codes = [self.categories.index(cat) for _, cat, _, _ in self.rules] + [self._default_code]
+        self._cache: 'OrderedDict[str, int]' = OrderedDict()
+        self.cache_size = cache_size
+        self.signature = hashlib.sha256(json.dumps([self.rules, default]).encode()).hexdigest()[:16]
+
+    def _hit_rule(self, hit: str) -> int:
+        rule = self._hit_rules.get(hit)
+        if rule is None:
+            keywords = self._keywords
+            rule = self._hit_rules[hit] = min(keywords.get(hit[start:end], len(self.rules))
+                                              for start in range(len(hit) + 1) for end in range(start, len(hit) + 1))
+        return rule
+
+    def _code(self, description: str) -> int:
+        """Category code of one distinct description."""
+        code = self._cache.get(description)
+        if code is not None:
+            self._cache.move_to_end(description)
+            return code
+        text = str(description)
+        best = len(self.rules)
+        if self._scanner is not None:
+            for hit in set(self._scanner.findall(text.lower())):
+                best = min(best, self._hit_rule(hit))
+        for i, pattern in self._regex_rules:
+            if i >= best:
+                break
+            if pattern.search(text):
+                best = i
+                break
+        code = self._rule_codes[best]
+        self._cache[description] = code
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return code
+
+    def __call__(self, descriptions: pd.Series) -> pd.Series:
+        """Categorical category per description."""
+        codes, uniques = pd.factorize(descriptions, use_na_sentinel=True)
+        unique_codes = np.fromiter((self._code(u) for u in uniques), dtype=np.int64, count=len(uniques))
+        default = self._default_code
+        row_codes = np.where(codes >= 0, unique_codes[codes] if len(unique_codes) else default, default)
+        return pd.Series(pd.Categorical.from_codes(row_codes, self.categories), index=descriptions.index)
+
+def preprocess(df: pd.DataFrame, categorizer: Categorizer = None) -> pd.DataFrame:
     """Parse dates, add month period and category columns."""
     df['Date'] = pd.to_datetime(df['Date'])
     df['Month'] = df['Date'].dt.to_period('M')
-    df['Category'] = df['Description'].apply(categorize)
+    df['Category'] = (categorizer or Categorizer())(df['Description'])
     return df
 
 def monthly_summary(df: pd.DataFrame) -> pd.DataFrame:
     """Aggregate transaction amounts per month and category."""
-    summary = df.groupby(['Month', 'Category'])['Amount'].sum().reset_index()
+    summary = df.groupby(['Month', 'Category'], observed=True)['Amount'].sum().reset_index()
     return summary
 
-def plot_spending(summary: pd.DataFrame, output_file: str = 'monthly_spending.png'):
+def iter_statement_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    """Yield typed DataFrame chunks of a CSV file or Parquet row groups."""
+    if path.endswith('.parquet'):
+        try:
+            # Imported here: pyarrow adds noticeably to startup of CSV-only runs
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow is required for Parquet statements. Install with 'pip install pyarrow'.")
+        parquet = pq.ParquetFile(path)
+        columns = [c for c in ('Date', 'Description', 'Amount', 'Account') if c in parquet.schema_arrow.names]
+        for group in range(parquet.num_row_groups):
+            yield parquet.read_row_group(group, columns=columns).to_pandas()
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in ('Date', 'Description', 'Amount', 'Account') if c in header]
+    dtypes = {c: t for c, t in STATEMENT_DTYPES.items() if c in usecols}
+    yield from pd.read_csv(path, usecols=usecols, dtype=dtypes, parse_dates=['Date'], chunksize=chunk_rows)
+
+def aggregate_statement(path: str, categorizer: Categorizer, chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    """(Account, Month, Category) totals and counts of one statement, built chunk by chunk.
+
+    Rows without an Account column are attributed to the file name.
+    """
+    account = Path(path).stem
+    total = None
+    for chunk in iter_statement_chunks(path, chunk_rows):
+        chunk['Date'] = pd.to_datetime(chunk['Date'])
+        if 'Account' not in chunk:
+            chunk['Account'] = account
+        chunk['Month'] = chunk['Date'].dt.to_period('M').astype('category')
+        chunk['Account'] = chunk['Account'].astype('category')
+        chunk['Category'] = categorizer(chunk['Description'])
+        part = chunk.groupby(['Account', 'Month', 'Category'], observed=True)['Amount'].agg(['sum', 'count'])
+        total = part if total is None else total.add(part, fill_value=0)
+    if total is None:
+        return pd.DataFrame(columns=['Account', 'Month', 'Category', 'Amount', 'Count'])
+    total = total.rename(columns={'sum': 'Amount', 'count': 'Count'}).reset_index()
+    total['Month'] = total['Month'].astype(str)
+    total['Count'] = total['Count'].astype('int64')
+    return total
+
+class SummaryStore:
+    """Materialized monthly aggregates kept up to date file by file.
+
+    Each statement's (Account, Month, Category) aggregate is stored under
+    ``parts/`` together with the file's size and mtime in ``manifest.json``.
+    ``ingest`` re-reads only files that are new or changed (or every file
+    in the store when the categorization rules change) and then rewrites
+    the combined ``summary.csv`` and ``by_account.csv`` from the small
+    per-file parts.
+    """
+
+    def __init__(self, directory: str):
+        self.dir = Path(directory)
+        self.parts = self.dir / 'parts'
+        self.parts.mkdir(parents=True, exist_ok=True)
+        manifest = self.dir / 'manifest.json'
+        self.manifest = json.loads(manifest.read_text()) if manifest.exists() else {'rules': None, 'files': {}}
+
+    def _part_path(self, path: str) -> Path:
+        return self.parts / (hashlib.sha256(path.encode()).hexdigest()[:20] + '.csv')
+
+    def ingest(self, paths: list, categorizer: Categorizer, chunk_rows: int = CHUNK_ROWS) -> dict:
+        """Fold statements into the store; returns processed/skipped counts."""
+        paths = list(dict.fromkeys(os.path.abspath(path) for path in paths))
+        if self.manifest['rules'] != categorizer.signature:
+            # Earlier statements were categorized with the old rules: redo them too
+            previous = [path for path in self.manifest['files'] if path not in paths]
+            self.manifest = {'rules': categorizer.signature, 'files': {}}
+            for path in previous:
+                if os.path.exists(path):
+                    paths.append(path)
+                else:
+                    print(f"Warning: {path} is gone, dropping it from the summary", file=sys.stderr)
+        stats = {'processed': 0, 'skipped': 0, 'rows': 0, 'seconds': 0.0}
+        start = time.perf_counter()
+        for path in paths:
+            st = os.stat(path)
+            fingerprint = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+            entry = self.manifest['files'].get(path)
+            if entry and {k: entry[k] for k in fingerprint} == fingerprint and self._part_path(path).exists():
+                stats['skipped'] += 1
+                continue
+            part = aggregate_statement(path, categorizer, chunk_rows)
+            part.to_csv(self._part_path(path), index=False)
+            self.manifest['files'][path] = {**fingerprint, 'rows': int(part['Count'].sum())}
+            stats['processed'] += 1
+            stats['rows'] += int(part['Count'].sum())
+        live = {self._part_path(path).name for path in self.manifest['files']}
+        for part in self.parts.glob('*.csv'):
+            if part.name not in live:
+                part.unlink()
+        self._materialize()
+        stats['seconds'] = time.perf_counter() - start
+        return stats
+
+    def _materialize(self):
+        parts = [pd.read_csv(self._part_path(path), dtype={'Account': str, 'Month': str})
+                 for path in self.manifest['files']]
+        parts = [p for p in parts if len(p)]
+        if parts:
+            combined = pd.concat(parts, ignore_index=True)
+        else:
+            combined = pd.DataFrame(columns=['Account', 'Month', 'Category', 'Amount', 'Count'])
+        by_account = combined.groupby(['Account', 'Month', 'Category'], as_index=False)[['Amount', 'Count']].sum()
+        by_account.to_csv(self.dir / 'by_account.csv', index=False)
+        summary = combined.groupby(['Month', 'Category'], as_index=False)[['Amount', 'Count']].sum()
+        summary.to_csv(self.dir / 'summary.csv', index=False)
+        tmp = self.dir / 'manifest.json.tmp'
+        tmp.write_text(json.dumps(self.manifest, indent=1))
+        os.replace(tmp, self.dir / 'manifest.json')
+
+    def summary(self, by_account: bool = False) -> pd.DataFrame:
+        """The materialized summary with Month as a monthly Period, like ``monthly_summary``."""
+        df = pd.read_csv(self.dir / ('by_account.csv' if by_account else 'summary.csv'),
+                         dtype={'Account': str, 'Month': str})
+        df['Month'] = pd.PeriodIndex(df['Month'], freq='M')
+        return df
+
+def _pyplot():
+    """Import pyplot on the headless Agg backend on first use.
+
+    Importing matplotlib dominated startup of text-only runs, so nothing
+    imports it at module load.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def plot_spending(summary: pd.DataFrame, output_file: str = 'monthly_spending.png',
+                  title: str = 'Monthly Spending by Category'):
     """Create a stacked bar chart of spending (excluding income)."""
+    plt = _pyplot()
     pivot = summary.pivot(index='Month', columns='Category', values='Amount').fillna(0)
     if 'Income' in pivot.columns:
         pivot = pivot.drop(columns=['Income'])
-    ax = pivot.plot(kind='bar', stacked=True, figsize=(10, 6))
+    fig, ax = plt.subplots(figsize=(10, 6))
+    pivot.plot(kind='bar', stacked=True, ax=ax)
     ax.set_ylabel('Amount')
-    ax.set_title('Monthly Spending by Category')
-    plt.tight_layout()
-    plt.savefig(output_file)
-    plt.close()
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(output_file)
+    plt.close(fig)
+
+def _render_chart(job: tuple) -> str:
+    """Pool worker: render one chart job (summary, output file, title)."""
+    summary, output_file, title = job
+    plot_spending(summary, output_file, title)
+    return output_file
+
+def chart_jobs(by_account: pd.DataFrame, out_dir: str) -> list:
+    """One chart per account and year plus one per year over all accounts.
+
+    ``by_account`` has Account, Month (str or Period), Category and Amount.
+    Each job is (name, summary, output file, title).
+    """
+    df = by_account.assign(Month=by_account['Month'].astype(str))
+    df['Year'] = df['Month'].str[:4]
+    jobs = []
+    for year, group in df.groupby('Year'):
+        total = group.groupby(['Month', 'Category'], as_index=False)['Amount'].sum()
+        jobs.append((f'all-{year}', total, str(Path(out_dir) / f'all-{year}.png'), f'All accounts, {year}'))
+        for account, part in group.groupby('Account'):
+            safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(account))
+            jobs.append((f'{safe}-{year}', part[['Month', 'Category', 'Amount']].reset_index(drop=True),
+                         str(Path(out_dir) / f'{safe}-{year}.png'), f'{account}, {year}'))
+    return jobs
+
+def _summary_hash(summary: pd.DataFrame, title: str) -> str:
+    data = summary.to_csv(index=False) + title + str(CHART_VERSION)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def render_report(by_account: pd.DataFrame, out_dir: str, jobs: int = None, force: bool = False) -> dict:
+    """Render per-account and per-year charts in worker processes.
+
+    Charts whose data hash matches ``charts.json`` in ``out_dir`` and whose
+    file still exists are skipped. Returns rendered/skipped counts.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    index_path = out / 'charts.json'
+    index = {} if force or not index_path.exists() else json.loads(index_path.read_text())
+    todo = []
+    stats = {'rendered': 0, 'skipped': 0, 'seconds': 0.0}
+    start = time.perf_counter()
+    for name, summary, output_file, title in chart_jobs(by_account, out_dir):
+        digest = _summary_hash(summary, title)
+        if index.get(name) == digest and Path(output_file).exists():
+            stats['skipped'] += 1
+            continue
+        todo.append((name, digest, (summary, output_file, title)))
+    if todo:
+        workers = min(jobs or os.cpu_count() or 1, len(todo))
+        if workers == 1:
+            for _, _, job in todo:
+                _render_chart(job)
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                list(pool.map(_render_chart, [job for _, _, job in todo]))
+        for name, digest, _ in todo:
+            index[name] = digest
+        stats['rendered'] = len(todo)
+        index_path.write_text(json.dumps(index, indent=1, sort_keys=True))
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+def benchmark_reporting(accounts: int = 8, years: int = 3, jobs: int = None, runs: int = 3) -> None:
+    """Time cold start of a text-only run and chart rendering throughput."""
+    def best_of(cmd):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    text_only = best_of([sys.executable, os.path.abspath(__file__), '--no-chart'])
+    eager = best_of([sys.executable, '-c', 'import pandas, matplotlib.pyplot'])
+    print(f'Cold start, text-only run:           {text_only:.2f}s')
+    print(f'Cold start, pandas + pyplot imports: {eager:.2f}s')
+
+    rng = np.random.default_rng(0)
+    categories = sorted(set(CATEGORY_MAP.values()))
+    months = [str(p) for p in pd.period_range(f'{2024 - years + 1}-01', '2024-12', freq='M')]
+    rows = [(f'acct{a}', m, c, -float(rng.gamma(2, 100)))
+            for a in range(accounts) for m in months for c in categories]
+    by_account = pd.DataFrame(rows, columns=['Account', 'Month', 'Category', 'Amount'])
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, workers in (('serial', 1), ('pool', jobs or os.cpu_count() or 1)):
+            stats = render_report(by_account, os.path.join(tmp, label), workers)
+            print(f"Charts, {label} ({workers} workers): {stats['rendered']} in {stats['seconds']:.2f}s "
+                  f"= {stats['rendered'] / stats['seconds']:.1f}/s")
+        stats = render_report(by_account, os.path.join(tmp, 'pool'), jobs)
+        print(f"Charts, unchanged re-run: {stats['skipped']} skipped in {stats['seconds']:.2f}s")
 
 def main():
+    parser = argparse.ArgumentParser(description='Categorize and summarize bank transactions.')
+    parser.add_argument('--rules', help='CSV/JSON rule file (keyword, category, priority, regex).')
+    parser.add_argument('statements', nargs='*', help='CSV or Parquet statements to fold into --store.')
+    parser.add_argument('--store', default='expense_summary',
+                        help='Directory of the materialized summary (default: expense_summary).')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per CSV chunk.')
+    parser.add_argument('--no-chart', action='store_true', help='Print the text summary only.')
+    parser.add_argument('--report', metavar='DIR',
+                        help='Render per-account and per-year charts from --store into DIR.')
+    parser.add_argument('--jobs', '-j', type=int, help='Chart rendering processes (default: CPU count).')
+    parser.add_argument('--force', action='store_true', help='Re-render --report charts even if unchanged.')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark cold start and chart rendering.')
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark_reporting(jobs=args.jobs)
+        return
+    categorizer = Categorizer(load_rules(args.rules) if args.rules else None)
+
+    if args.statements or args.report:
+        store = SummaryStore(args.store)
+        if args.statements:
+            stats = store.ingest(args.statements, categorizer, args.chunk_rows)
+            print(f"Ingested {stats['processed']} statements ({stats['rows']} rows), "
+                  f"skipped {stats['skipped']} unchanged, in {stats['seconds']:.1f}s")
+        summary = store.summary()[['Month', 'Category', 'Amount']]
+        print('Monthly Summary:')
+        print(summary.to_string(index=False))
+        if args.report:
+            stats = render_report(store.summary(by_account=True), args.report, args.jobs, args.force)
+            print(f"Charts in {args.report}: {stats['rendered']} rendered, "
+                  f"{stats['skipped']} unchanged, in {stats['seconds']:.1f}s")
+        elif not args.no_chart:
+            plot_spending(summary)
+            print('Spending chart saved as monthly_spending.png')
+        return
+
     # Minimal inline sample data covering a few months
     data = [
         {'Date': '2024-01-05', 'Description': 'Supermarket purchase', 'Amount': -150.75},
@@ -73,12 +467,13 @@ def main():
         {'Date': '2024-03-10', 'Description': 'Salary for March', 'Amount': 3000.00},
     ]
     df = pd.DataFrame(data)
-    df = preprocess(df)
+    df = preprocess(df, categorizer)
     summary = monthly_summary(df)
     print('Monthly Summary:')
     print(summary.to_string(index=False))
-    plot_spending(summary)
-    print('Spending chart saved as monthly_spending.png')
+    if not args.no_chart:
+        plot_spending(summary)
+        print('Spending chart saved as monthly_spending.png')
 
 if __name__ == '__main__':
     main()
@@ -4,15 +4,64 @@ FileOrganizer: automatically sort files by type and modification date.
 """
 
 import argparse
+import ctypes
+import errno
+import hashlib
+import json
+import mmap
+import os
+import select
+import signal
+import sqlite3
 import shutil
+import stat
+import struct
 import sys
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 import mimetypes
 
+MOVE_WORKERS = 16
+MOVES_PER_TASK = 256
+PROGRESS_INTERVAL = 2.0
+JOURNAL_DIR = ".organizer"
+# Journal records written between fsyncs
+JOURNAL_SYNC_RECORDS = 64
+# Bytes read at a time when looking at the last records of a journal
+JOURNAL_TAIL_BLOCK = 64 * 1024
+DEDUP_ACTIONS = ("hardlink", "skip", "quarantine")
+# Content index in the journal directory, kept current by every run once --dedup created it
+DEDUP_INDEX = "dedup.sqlite3"
+# Bytes hashed from each end of a file before comparing full hashes
+PARTIAL_BLOCK = 64 * 1024
+HASH_BUFFER = 1 << 20
+MMAP_THRESHOLD = 8 << 20
+# Seconds a file's size and mtime must hold still before it is moved when
+# no close event tells us it is complete (polling, files found by scanning)
+WATCH_DEBOUNCE = 0.25
+WATCH_POLL_INTERVAL = 1.0
+# Names used by downloaders and editors while a file is still being written
+PARTIAL_SUFFIXES = (".part", ".partial", ".crdownload", ".download", ".tmp", ".swp")
+
 def categorize_file(file_path: Path) -> str:
     """Return a category folder name based on mime type."""
-    mime, _ = mimetypes.guess_type(file_path.name)
+    # Only the extension matters, so the lookup is cached per extension
+    return _category_for_suffixes(_suffix_key(file_path.name))
+
+def _suffix_key(name: str) -> str:
+    """The last two suffixes of a file name, as ``Path.suffixes`` splits them."""
+    if name.endswith("."):
+        return ""
+    parts = name.lstrip(".").split(".")[1:]
+    return "." + ".".join(parts[-2:]) if parts else ""
+
+@lru_cache(maxsize=4096)
+def _category_for_suffixes(suffixes: str) -> str:
+    mime, _ = mimetypes.guess_type("x" + suffixes)
     if not mime:
         return "Others"
     main_type = mime.split('/')[0]
@@ -25,39 +74,850 @@ def categorize_file(file_path: Path) -> str:
     }
     return mapping.get(main_type, "Others")
 
-def safe_move(src: Path, dst: Path):
-    """Move src to dst, renaming if a conflict exists."""
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    if dst.exists():
-        stem = dst.stem
-        suffix = dst.suffix
-        counter = 1
-        while True:
-            new_name = f"{stem}_{counter}{suffix}"
-            new_dst = dst.with_name(new_name)
-            if not new_dst.exists():
-                dst = new_dst
-                break
-            counter += 1
+class NameIndex:
+    """Names present in destination directories, listed once per directory.
+
+    Collision names are decided here in memory instead of probing the
+    filesystem with ``exists()`` for every ``_1``, ``_2`` ... candidate.
+    """
+
+    def __init__(self):
+        self._dirs = {}
+
+    def names(self, directory: str) -> set:
+        names = self._dirs.get(directory)
+        if names is None:
+            try:
+                names = set(os.listdir(directory))
+            except FileNotFoundError:
+                names = set()
+            self._dirs[directory] = names
+        return names
+
+    def claim(self, directory: str, name: str) -> str:
+        """Reserve and return ``name`` or the first free ``stem_N.suffix``."""
+        names = self.names(directory)
+        if name in names:
+            stem, suffix = os.path.splitext(name)
+            counter = 1
+            while f"{stem}_{counter}{suffix}" in names:
+                counter += 1
+            name = f"{stem}_{counter}{suffix}"
+        names.add(name)
+        return name
+
+    def forget(self, directory: str):
+        """Drop a listing that may be stale, e.g. after another process wrote there."""
+        self._dirs.pop(directory, None)
+
+def safe_move(src: Path, dst: Path, index: NameIndex = None, made_dirs: set = None) -> Path:
+    """Move src to dst, renaming if a conflict exists. Returns the final path.
+
+    Directories in ``made_dirs`` are known to exist and are not created
+    again; new ones are added to it.
+    """
+    parent = str(dst.parent)
+    if made_dirs is None or parent not in made_dirs:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if made_dirs is not None:
+            made_dirs.add(parent)
+    index = index or NameIndex()
+    name = index.claim(parent, dst.name)
+    if os.path.lexists(os.path.join(parent, name)):
+        # The cached listing is out of date
+        index.forget(parent)
+        name = index.claim(parent, dst.name)
+    dst = dst.with_name(name)
     shutil.move(str(src), str(dst))
+    return dst
 
 def organize(src_dir: Path, dst_dir: Path, by_type: bool, by_date: bool, dry_run: bool):
     """Iterate over files in src_dir and move them to dst_dir based on criteria."""
-    for item in src_dir.iterdir():
-        if item.is_file():
+    return organize_tree(src_dir, dst_dir, by_type, by_date, dry_run, workers=1, verbose=True, recursive=False)
+
+def scan_tree(src_dir: Path, exclude: Path = None, recursive: bool = True, skip_partial: bool = False):
+    """Yield DirEntry objects of all files below src_dir, depth first.
+
+    Symlinked directories are not followed and ``exclude`` (usually the
+    destination when it lies inside the source) is skipped. With
+    ``skip_partial``, files carrying a download suffix are left in place.
+    """
+    exclude = str(exclude) if exclude else None
+    stack = [str(src_dir)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and entry.path != exclude:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            if not (skip_partial and entry.name.endswith(PARTIAL_SUFFIXES)):
+                                yield entry
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Warning: cannot scan {e.filename}: {e.strerror}", file=sys.stderr)
+
+def plan_moves(entries, dst_dir: Path, by_type: bool, by_date: bool, index: NameIndex = None,
+               file_stats: list = None):
+    """Return [(id, src, dst, same_device, link_to)] for the entries, with unique destinations.
+
+    Uses the stat data cached on each DirEntry. Name collisions, with files
+    already in a target directory or with other planned moves, are resolved
+    by the NameIndex like ``safe_move`` does. ``link_to`` is always None
+    here; deduplication sets it. Stat results are appended to ``file_stats``.
+    """
+    dst_dir = str(dst_dir)
+    dst_device = os.stat(dst_dir).st_dev
+    index = index or NameIndex()
+    targets = {}
+    day_names = {}
+    moves = []
+    for entry in entries:
+        st = entry.stat()
+        category = _category_for_suffixes(_suffix_key(entry.name)) if by_type else None
+        day = None
+        if by_date:
+            # UTC offsets are whole quarter hours, so a 15 minute bucket
+            # never straddles local midnight
+            bucket = int(st.st_mtime // 900)
+            day = day_names.get(bucket)
+            if day is None:
+                day = day_names[bucket] = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d")
+        target_dir = targets.get((category, day))
+        if target_dir is None:
+            target_dir = targets[(category, day)] = os.path.join(dst_dir, *[p for p in (category, day) if p])
+        name = index.claim(target_dir, entry.name)
+        moves.append((len(moves), entry.path, os.path.join(target_dir, name), st.st_dev == dst_device, None))
+        if file_stats is not None:
+            file_stats.append(st)
+    return moves
+
+class MoveJournal:
+    """Append-only write-ahead log of one run's moves, as JSON lines.
+
+    Every planned move is written and fsynced before any file is touched.
+    Completed moves are appended per batch and fsynced every
+    JOURNAL_SYNC_RECORDS records, so a crash loses at most that many
+    completion records. Those moves are recognised on resume because the
+    source is gone and the destination exists.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = 0
+
+    def append(self, record: list, sync: bool = False):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._unsynced += 1
+        if sync or self._unsynced >= JOURNAL_SYNC_RECORDS:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    @staticmethod
+    def read(path: Path) -> dict:
+        """Replay a journal into plans, completed and undone move ids."""
+        state = {"header": {}, "plans": {}, "done": [], "undone": set(), "ended": False, "undo_ended": False}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Torn last line of an interrupted write
+                kind = record[0]
+                if kind == "run":
+                    state["header"] = record[1]
+                elif kind == "plan":
+                    src, dst, same_device, *link_to = record[2:]
+                    state["plans"][record[1]] = (src, dst, same_device, link_to[0] if link_to else None)
+                elif kind == "done":
+                    state["done"].extend(record[1])
+                elif kind == "undo":
+                    state["undone"].update(record[1])
+                elif kind == "end":
+                    state["ended"] = True
+                elif kind == "undo-end":
+                    state["undo_ended"] = True
+        return state
+
+    @staticmethod
+    def ended(path: Path) -> bool:
+        """Whether the run (or an undo of it) recorded in ``path`` finished.
+
+        Only undo records follow "end", so the journal is read backwards
+        from its end and only as far as the first record of another kind.
+        """
+        with open(path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            head = b""
+            while position > 0:
+                step = min(JOURNAL_TAIL_BLOCK, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + head).split(b"\n")
+                # The first line may continue in the previous block
+                head = lines.pop(0) if position else b""
+                for line in reversed(lines):
+                    try:
+                        kind = json.loads(line)[0]
+                    except (ValueError, IndexError):
+                        continue  # Blank or torn last line
+                    if kind in ("end", "undo-end"):
+                        return True
+                    if kind != "undo":
+                        return False
+        return False
+
+def _new_journal(journal_dir: Path, header: dict) -> MoveJournal:
+    journal_dir.mkdir(parents=True, exist_ok=True)
+    name = f"journal-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+    journal = MoveJournal(journal_dir / name)
+    journal.append(["run", header], sync=True)
+    return journal
+
+def _apply_moves(batch, no_clobber: bool = False):
+    """Thread pool task: rename on the same device, copy and delete across devices.
+
+    Moves with ``link_to`` hard-link that file at dst and drop the source.
+    """
+    errors = {}
+    for move_id, src, dst, same_device, link_to in batch:
+        try:
+            if no_clobber and os.path.lexists(dst):
+                raise FileExistsError(errno.EEXIST, "destination exists", dst)
+            if link_to:
+                os.link(link_to, dst)
+                os.unlink(src)
+                continue
+            if same_device:
+                try:
+                    os.rename(src, dst)
+                    continue
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+            shutil.move(src, dst)
+        except OSError as e:
+            errors[move_id] = e
+    return batch, errors
+
+def _execute(moves: list, journal: MoveJournal, stats: dict, workers: int, verbose: bool,
+             undo: bool = False, end: bool = True) -> dict:
+    """Run moves on a bounded thread pool, journaling completed batches.
+
+    Ids of failed moves are collected in ``stats["failed"]``.
+    """
+    for directory in {os.path.dirname(move[2]) for move in moves}:
+        os.makedirs(directory, exist_ok=True)
+    started = last_report = time.perf_counter()
+    done_kind = "undo" if undo else "done"
+
+    def collect(future):
+        batch, errors = future.result()
+        journal.append([done_kind, [move[0] for move in batch if move[0] not in errors]])
+        stats["moved"] += len(batch) - len(errors)
+        stats["errors"] += len(errors)
+        stats.setdefault("failed", set()).update(errors)
+        for move_id, src, dst, _, link_to in batch:
+            if move_id in errors:
+                print(f"Error: {src} -> {dst}: {errors[move_id]}", file=sys.stderr)
+            elif verbose:
+                print(f"{'Linked' if link_to else 'Moved'}: {src} -> {dst}")
+
+    with ThreadPoolExecutor(workers) as pool:
+        pending = set()
+        for i in range(0, len(moves), MOVES_PER_TASK):
+            pending.add(pool.submit(_apply_moves, moves[i:i + MOVES_PER_TASK], undo))
+            # Keep a bounded number of batches in flight
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            if time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.perf_counter()
+                _report_progress(stats, started)
+        for future in pending:
+            collect(future)
+    if end:
+        journal.append(["undo-end" if undo else "end"], sync=True)
+    _report_progress(stats, started)
+    return stats
+
+def resume_journal(path: Path, workers: int = MOVE_WORKERS, verbose: bool = False) -> dict:
+    """Finish the moves of an interrupted run recorded in ``path``."""
+    state = MoveJournal.read(path)
+    done = set(state["done"])
+    index = NameIndex()
+    journal = MoveJournal(path)
+    todo, finished, lost = [], [], []
+    for move_id, (src, dst, same_device, link_to) in state["plans"].items():
+        if move_id in done:
+            continue
+        if os.path.lexists(src):
+            if os.path.lexists(dst):
+                # Something else took the name since the plan was written
+                dst = os.path.join(os.path.dirname(dst), index.claim(os.path.dirname(dst), os.path.basename(dst)))
+                journal.append(["plan", move_id, src, dst, same_device, link_to])
+            todo.append((move_id, src, dst, same_device, link_to))
+        elif os.path.lexists(dst):
+            finished.append(move_id)
+        else:
+            lost.append(move_id)
+            print(f"Warning: {src} vanished before it was moved", file=sys.stderr)
+    journal.append(["done", finished], sync=True)
+    print(f"Resuming {path}: {len(todo)} moves left, {len(finished)} already done", file=sys.stderr)
+    stats = {"files": len(todo), "moved": 0, "errors": len(lost)}
+    try:
+        _execute_phases(todo, journal, stats, workers, verbose)
+    finally:
+        journal.close()
+    index_path = path.parent / DEDUP_INDEX
+    if index_path.exists():
+        failed = stats.get("failed", ())
+        placed = [state["plans"][move_id][1] for move_id in finished]
+        placed += [dst for move_id, _, dst, _, _ in todo if move_id not in failed]
+        rows = []
+        for dst in placed:
+            try:
+                st = os.stat(dst)
+            except OSError:
+                continue
+            rows.append((dst, st.st_size, st.st_mtime_ns, None, None))
+        DedupIndex(index_path, Path(state["header"].get("destination", path.parent.parent))).add(rows)
+    return stats
+
+def _execute_phases(moves: list, journal: MoveJournal, stats: dict, workers: int, verbose: bool) -> dict:
+    """Plain moves first, then hard links, which may point at files moved in the first phase."""
+    links = [move for move in moves if move[4]]
+    _execute([move for move in moves if not move[4]], journal, stats, workers, verbose, end=not links)
+    if links:
+        _execute(links, journal, stats, workers, verbose)
+    return stats
+
+def undo_journal(path: Path, workers: int = MOVE_WORKERS, verbose: bool = False) -> dict:
+    """Move every file recorded in a journal back to where it came from."""
+    state = MoveJournal.read(path)
+    order = list(reversed(state["done"]))
+    recorded = set(order)
+    # Moves of a crashed run that finished without a completion record
+    order += [move_id for move_id, (src, dst, _, _) in state["plans"].items()
+              if move_id not in recorded and not os.path.lexists(src) and os.path.lexists(dst)]
+    # A hard-linked duplicate is restored by renaming its link back
+    moves = [(move_id, state["plans"][move_id][1], state["plans"][move_id][0], True, None)
+             for move_id in order if move_id not in state["undone"]]
+    journal = MoveJournal(path)
+    stats = {"files": len(moves), "moved": 0, "errors": 0}
+    try:
+        return _execute(moves, journal, stats, workers, verbose, undo=True)
+    finally:
+        journal.close()
+
+def _incomplete_journals(journal_dir: Path) -> list:
+    if not journal_dir.is_dir():
+        return []
+    paths = sorted(journal_dir.glob("journal-*.jsonl"))
+    return [path for path in paths if not MoveJournal.ended(path)]
+
+def _partial_hash(path: str, size: int) -> bytes:
+    """Hash of the first and last PARTIAL_BLOCK bytes of a file."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BLOCK))
+        if size > PARTIAL_BLOCK:
+            f.seek(max(PARTIAL_BLOCK, size - PARTIAL_BLOCK))
+            h.update(f.read(PARTIAL_BLOCK))
+    return h.digest()
+
+def _full_hash(path: str) -> bytes:
+    """SHA-256 of a whole file, through mmap for large files.
+
+    hashlib releases the GIL on large buffers, so hashing threads overlap.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                h.update(m)
+        else:
+            buffer = bytearray(HASH_BUFFER)
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                h.update(view[:n])
+    return h.digest()
+
+def _try_hash(func, *args):
+    try:
+        return func(*args)
+    except OSError:
+        return None
+
+class DedupIndex:
+    """Persistent content index of organized files, kept in SQLite.
+
+    Rows map a destination path to its size, mtime, partial hash and full
+    hash. Hashes start empty and are filled in the first time a file of the
+    same size arrives, so most files are never read. Rows are checked
+    against the filesystem only when they are candidates: missing or
+    resized files are dropped, and a changed mtime clears the hashes. A new
+    index is seeded with the files already in the destination; after that,
+    every run, resume and watch that moves files into the destination adds
+    them, with or without --dedup.
+    """
+
+    def __init__(self, path: Path, dst_dir: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        new = not path.exists()
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                          "mtime INTEGER NOT NULL, partial BLOB, full BLOB)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_size ON files (size)")
+        if new:
+            self.add((entry.path, st.st_size, st.st_mtime_ns, None, None)
+                     for entry in scan_tree(dst_dir, dst_dir / JOURNAL_DIR)
+                     for st in (entry.stat(),))
+
+    def add(self, rows):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", rows)
+
+    def forget(self, paths):
+        with self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
+
+    def sizes(self) -> set:
+        return {size for (size,) in self.conn.execute("SELECT DISTINCT size FROM files")}
+
+    def rows(self, sizes) -> list:
+        """Rows for the given sizes, as mutable lists."""
+        rows = []
+        sizes = list(sizes)
+        for i in range(0, len(sizes), 500):
+            chunk = sizes[i:i + 500]
+            rows += self.conn.execute(f"SELECT * FROM files WHERE size IN ({','.join('?' * len(chunk))})",
+                                      chunk)
+        return [list(row) for row in rows]
+
+    def find_duplicates(self, moves: list, file_stats: list, workers: int):
+        """Map move ids of duplicate files to the path of the original.
+
+        The original is an indexed destination file, or the planned
+        destination of an earlier file of the same run. Also returns the
+        (partial, full) hashes computed per move id.
+        """
+        known = self.sizes()
+        by_size = defaultdict(list)
+        for move_id, st in enumerate(file_stats):
+            if st.st_size:
+                by_size[st.st_size].append(move_id)
+        candidates = {size for size, ids in by_size.items() if size in known or len(ids) > 1}
+        hashes = {}
+        duplicates = {}
+        if not candidates:
+            return duplicates, hashes
+
+        def verify(row):
+            try:
+                st = os.stat(row[0])
+            except OSError:
+                return False
+            if st.st_size != row[1]:
+                return False
+            if st.st_mtime_ns != row[2]:
+                row[2:] = [st.st_mtime_ns, None, None]
+            if row[3] is None:
+                row[3] = _try_hash(_partial_hash, row[0], row[1])
+            return row[3] is not None
+
+        with ThreadPoolExecutor(workers) as pool:
+            run_ids = [move_id for size in candidates for move_id in by_size[size]]
+            partials = pool.map(lambda i: _try_hash(_partial_hash, moves[i][1], file_stats[i].st_size), run_ids)
+            hashes = {move_id: (partial, None) for move_id, partial in zip(run_ids, partials)}
+            rows = self.rows(candidates)
+            valid = list(pool.map(verify, rows))
+            stale = [row[0] for row, ok in zip(rows, valid) if not ok]
+            rows = [row for row, ok in zip(rows, valid) if ok]
+
+            groups = defaultdict(lambda: ([], []))
+            for move_id in run_ids:
+                if hashes[move_id][0] is not None:
+                    groups[(file_stats[move_id].st_size, hashes[move_id][0])][0].append(move_id)
+            for row in rows:
+                if (row[1], row[3]) in groups:
+                    groups[(row[1], row[3])][1].append(row)
+            groups = [group for group in groups.values() if group[1] or len(group[0]) > 1]
+
+            need_run = [move_id for ids, _ in groups for move_id in ids]
+            need_rows = [row for _, group_rows in groups for row in group_rows if row[4] is None]
+            for move_id, full in zip(need_run, pool.map(lambda i: _try_hash(_full_hash, moves[i][1]), need_run)):
+                hashes[move_id] = (hashes[move_id][0], full)
+            for row, full in zip(need_rows, pool.map(lambda r: _try_hash(_full_hash, r[0]), need_rows)):
+                row[4] = full
+        self.forget(stale)
+        self.add(tuple(row) for row in rows)
+
+        for ids, group_rows in groups:
+            originals = {row[4]: row[0] for row in group_rows if row[4] is not None}
+            for move_id in sorted(ids):
+                full = hashes[move_id][1]
+                if full is None:
+                    continue
+                if full in originals:
+                    duplicates[move_id] = originals[full]
+                else:
+                    originals[full] = moves[move_id][2]
+        return duplicates, hashes
+
+def deduplicate(moves: list, file_stats: list, index: DedupIndex, action: str, quarantine_dir: Path,
+                names: NameIndex, workers: int, verbose: bool):
+    """Apply the --dedup action to planned moves; returns (moves, hashes, duplicate count)."""
+    duplicates, hashes = index.find_duplicates(moves, file_stats, workers)
+    result = []
+    for move in moves:
+        move_id, src, dst, same_device, _ = move
+        original = duplicates.get(move_id)
+        if original is None:
+            result.append(move)
+        elif action == "hardlink":
+            result.append((move_id, src, dst, same_device, original))
+        elif action == "quarantine":
+            target = os.path.join(quarantine_dir, names.claim(str(quarantine_dir), os.path.basename(src)))
+            result.append((move_id, src, target, os.stat(src).st_dev == os.stat(quarantine_dir).st_dev, None))
+        elif verbose:
+            print(f"Skipped duplicate: {src} (same as {original})")
+    return result, hashes, len(duplicates)
+
+def organize_tree(src_dir: Path, dst_dir: Path, by_type: bool, by_date: bool, dry_run: bool,
+                  workers: int = MOVE_WORKERS, verbose: bool = False, recursive: bool = True,
+                  journal_dir: Path = None, dedup: str = None, quarantine_dir: Path = None,
+                  skip_partial: bool = False) -> dict:
+    """Organize src_dir: scan, plan every move, journal the plan, then move in parallel.
+
+    Interrupted runs found in ``journal_dir`` (default: DST/.organizer) are
+    resumed first. Moves run in batches on a bounded thread pool; renames
+    release the GIL, so throughput is limited by the filesystem. Progress
+    goes to stderr. ``dedup`` ("hardlink", "skip" or "quarantine") handles
+    files whose content already exists in the destination. ``skip_partial``
+    leaves unfinished downloads alone (used before ``watch`` takes over).
+    """
+    journal_dir = Path(journal_dir) if journal_dir else dst_dir / JOURNAL_DIR
+    if not dry_run:
+        for path in _incomplete_journals(journal_dir):
+            resume_journal(path, workers, verbose)
+    start = time.perf_counter()
+    exclude = dst_dir if dst_dir.is_relative_to(src_dir) else None
+    names = NameIndex()
+    index_path = journal_dir / DEDUP_INDEX
+    # Stats are only needed to deduplicate or to keep an existing index current
+    file_stats = [] if dedup or (index_path.exists() and not dry_run) else None
+    moves = plan_moves(scan_tree(src_dir, exclude, recursive, skip_partial), dst_dir, by_type, by_date, names,
+                       file_stats)
+    planned = time.perf_counter()
+    stats = {"files": len(moves), "moved": 0, "errors": 0, "scan_seconds": planned - start}
+    print(f"Planned {len(moves)} moves in {planned - start:.1f}s", file=sys.stderr)
+    index = None
+    hashes = {}
+    if dedup and moves:
+        index = DedupIndex(index_path, dst_dir)
+        quarantine_dir = Path(quarantine_dir) if quarantine_dir else journal_dir / "quarantine"
+        quarantine_dir.mkdir(parents=True, exist_ok=True)
+        moves, hashes, stats["duplicates"] = deduplicate(moves, file_stats, index, dedup, quarantine_dir, names,
+                                                         workers, verbose)
+        stats["files"] = len(moves)
+        print(f"Found {stats['duplicates']} duplicates in {time.perf_counter() - planned:.1f}s "
+              f"({dedup})", file=sys.stderr)
+    if dry_run:
+        for _, src, dst, _, link_to in moves:
+            if link_to:
+                print(f"[DRY-RUN] Would link: {src} -> {dst} (duplicate of {link_to})")
+            else:
+                print(f"[DRY-RUN] Would move: {src} -> {dst}")
+        return stats
+    if not moves:
+        return stats
+    if index is None and file_stats is not None:
+        # Not deduplicating this time, but later --dedup runs must know these files
+        index = DedupIndex(index_path, dst_dir)
+    journal = _new_journal(journal_dir, {"source": str(src_dir), "destination": str(dst_dir),
+                                         "started": datetime.now().isoformat(timespec="seconds")})
+    try:
+        for move in moves:
+            journal.append(["plan", *move])
+        journal.sync()
+        _execute_phases(moves, journal, stats, workers, verbose)
+    finally:
+        journal.close()
+    if index is not None:
+        quarantined = str(quarantine_dir) + os.sep if dedup else None
+        failed = stats.get("failed", ())
+        index.add((dst, file_stats[move_id].st_size, file_stats[move_id].st_mtime_ns,
+                   *hashes.get(move_id, (None, None)))
+                  for move_id, _, dst, _, _ in moves
+                  if move_id not in failed and not (quarantined and dst.startswith(quarantined)))
+    stats["seconds"] = time.perf_counter() - start
+    stats["journal"] = str(journal.path)
+    print(f"Journal: {journal.path} (revert with --undo)", file=sys.stderr)
+    return stats
+
+class _Inotify:
+    """Minimal inotify binding through ctypes; raises OSError where unavailable."""
+
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_MOVE_SELF = 0x800
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x1000000
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MOVE_SELF | IN_ONLYDIR
+
+    def __init__(self):
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (AttributeError, OSError) as e:
+            raise OSError(errno.ENOSYS, f"inotify is not available: {e}") from None
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.fd = fd
+        self.dirs = {}
+        self._poll = select.poll()
+        self._poll.register(fd, select.POLLIN)
+
+    def add(self, directory: str):
+        wd = self._add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()), directory)
+        self.dirs[wd] = directory
+
+    def remove(self, wd: int):
+        self._rm_watch(self.fd, wd)
+        self.dirs.pop(wd, None)
+
+    def read(self, timeout: float = None) -> list:
+        """Return [(directory, name, mask)], waiting up to timeout seconds (None: forever)."""
+        if not self._poll.poll(None if timeout is None else max(0, int(timeout * 1000) + 1)):
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+                name = data[offset + 16:offset + 16 + length].split(b"\0", 1)[0]
+                offset += 16 + length
+                if mask & self.IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                elif mask & self.IN_MOVE_SELF:
+                    # Moved away; the new location, if watched, reports it as created
+                    self.remove(wd)
+                elif mask & self.IN_Q_OVERFLOW or wd in self.dirs:
+                    events.append((self.dirs.get(wd), os.fsdecode(name), mask))
+
+    def close(self):
+        os.close(self.fd)
+
+class _DirPoller:
+    """Polling fallback: re-lists only directories whose mtime changed."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.dirs = {}
+
+    def add(self, directory: str):
+        self.dirs[directory] = os.stat(directory).st_mtime_ns
+
+    def read(self, timeout: float = None) -> list:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        events = []
+        for directory, mtime in list(self.dirs.items()):
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                del self.dirs[directory]
+                continue
+            if current == mtime:
+                continue
+            self.dirs[directory] = current
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if not is_dir or entry.path not in self.dirs:
+                            events.append((directory, entry.name, _Inotify.IN_ISDIR | _Inotify.IN_CREATE if is_dir else 0))
+            except OSError:
+                continue
+        return events
+
+    def close(self):
+        pass
+
+def watch(src_dir: Path, dst_dir: Path, by_type: bool, by_date: bool, recursive: bool = False,
+          debounce: float = WATCH_DEBOUNCE, poll: bool = False, poll_interval: float = WATCH_POLL_INTERVAL,
+          verbose: bool = False, journal_dir: Path = None):
+    """Organize files as they arrive in src_dir until interrupted.
+
+    Uses inotify on Linux and falls back to polling directory mtimes
+    elsewhere, or with ``poll``. With inotify a file is moved once its
+    writer closes it (IN_CLOSE_WRITE) or it is renamed into place
+    (IN_MOVED_TO); a write after that puts it back to waiting. Files only
+    seen by polling or by scanning a directory are moved once their size
+    and mtime have held still for ``debounce`` seconds. Files still
+    carrying a download suffix wait for their final name. Ready files are moved in batches through
+    ``safe_move``, with destination listings and created directories
+    cached across batches. With inotify the loop sleeps in the kernel
+    while nothing arrives. Moved files are added to the dedup index in
+    ``journal_dir`` (default: DST/.organizer) if there is one.
+    """
+    exclude = str(dst_dir) if dst_dir.is_relative_to(src_dir) else None
+    try:
+        if poll:
+            raise OSError(errno.ENOSYS, "polling requested")
+        watcher = _Inotify()
+    except OSError as e:
+        if not poll:
+            print(f"Warning: {e.strerror}; polling every {poll_interval}s", file=sys.stderr)
+        watcher = _DirPoller(poll_interval)
+    polling = isinstance(watcher, _DirPoller)
+    # path -> (deadline, first_seen, size at last check, or None once known complete)
+    pending = {}
+    names = NameIndex()
+    made_dirs = set()
+    day_names = {}
+    stats = {"moved": 0, "errors": 0}
+    index_path = (Path(journal_dir) if journal_dir else dst_dir / JOURNAL_DIR) / DEDUP_INDEX
+    index = DedupIndex(index_path, dst_dir) if index_path.exists() else None
+
+    def add_tree(directory: str):
+        """Watch a directory (and its subdirectories) and queue the files already in it."""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                watcher.add(current)
+                entries = list(os.scandir(current))
+            except OSError as e:
+                print(f"Warning: cannot watch {current}: {e.strerror}", file=sys.stderr)
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and entry.path != exclude:
+                        stack.append(entry.path)
+                elif not entry.name.endswith(PARTIAL_SUFFIXES):
+                    queue(entry.path)
+
+    def queue(path: str, complete: bool = False):
+        now = time.monotonic()
+        first_seen = pending[path][1] if path in pending else now
+        pending[path] = (now, first_seen, None) if complete else (now + debounce, first_seen, -1)
+
+    def move_ready(ready: list):
+        now = time.time()
+        latencies = []
+        placed = []
+        for path, first_seen, size in ready:
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            if size is not None and (st.st_size != size or now - st.st_mtime < debounce):
+                # No close event to go by: wait until size and mtime settle
+                pending[path] = (time.monotonic() + debounce, first_seen, st.st_size)
+                continue
             parts = []
             if by_type:
-                parts.append(categorize_file(item))
+                parts.append(categorize_file(Path(path)))
             if by_date:
-                mod_time = datetime.fromtimestamp(item.stat().st_mtime)
-                parts.append(mod_time.strftime("%Y-%m-%d"))
-            target_dir = dst_dir.joinpath(*parts) if parts else dst_dir
-            target_path = target_dir / item.name
-            if dry_run:
-                print(f"[DRY-RUN] Would move: {item} -> {target_path}")
-            else:
-                safe_move(item, target_path)
-                print(f"Moved: {item} -> {target_path}")
+                bucket = int(st.st_mtime // 900)
+                day = day_names.get(bucket)
+                if day is None:
+                    day = day_names[bucket] = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d")
+                parts.append(day)
+            target = dst_dir.joinpath(*parts, os.path.basename(path))
+            try:
+                target = safe_move(Path(path), target, names, made_dirs)
+            except OSError as e:
+                stats["errors"] += 1
+                print(f"Error: {path} -> {target}: {e}", file=sys.stderr)
+                continue
+            stats["moved"] += 1
+            placed.append((str(target), st.st_size, st.st_mtime_ns, None, None))
+            latencies.append(time.monotonic() - first_seen)
+            if verbose:
+                print(f"Moved: {path} -> {target}")
+        if index is not None and placed:
+            index.add(placed)
+        if latencies:
+            print(f"Moved {len(latencies)} files (total {stats['moved']}, {stats['errors']} errors), "
+                  f"max latency {max(latencies) * 1000:.0f} ms", file=sys.stderr)
+
+    kind = "polling" if polling else "inotify"
+    print(f"Watching {src_dir} ({kind}), Ctrl-C to stop", file=sys.stderr)
+    add_tree(str(src_dir))
+    previous_handler = signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        while True:
+            now = time.monotonic()
+            timeout = max(0.0, min(deadline for deadline, _, _ in pending.values()) - now) if pending else None
+            for directory, name, mask in watcher.read(timeout):
+                if directory is None:
+                    # Event queue overflow: rescan everything
+                    print("Warning: event queue overflowed, rescanning", file=sys.stderr)
+                    add_tree(str(src_dir))
+                    continue
+                path = os.path.join(directory, name)
+                if mask & _Inotify.IN_ISDIR:
+                    if recursive and path != exclude and mask & (_Inotify.IN_CREATE | _Inotify.IN_MOVED_TO):
+                        add_tree(path)
+                elif name.endswith(PARTIAL_SUFFIXES):
+                    continue
+                elif polling:
+                    queue(path)
+                elif mask & (_Inotify.IN_CLOSE_WRITE | _Inotify.IN_MOVED_TO):
+                    queue(path, complete=True)
+                elif mask & _Inotify.IN_MODIFY:
+                    # Written to again: wait for the writer to close it
+                    pending.pop(path, None)
+            now = time.monotonic()
+            ready = [(path, *rest) for path, (deadline, *rest) in pending.items() if deadline <= now]
+            for path, _, _ in ready:
+                del pending[path]
+            if ready:
+                move_ready(ready)
+    except KeyboardInterrupt:
+        print(f"Stopped; moved {stats['moved']} files ({stats['errors']} errors)", file=sys.stderr)
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        watcher.close()
+    return stats
+
+def _report_progress(stats: dict, since: float):
+    elapsed = max(time.perf_counter() - since, 1e-9)
+    print(f"Moved {stats['moved']}/{stats['files']} files ({stats['errors']} errors), "
+          f"{stats['moved'] / elapsed:,.0f} files/s", file=sys.stderr)
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Organize files by type and modification date.")
@@ -66,23 +926,53 @@ def parse_args():
     parser.add_argument("--no-type", action="store_true", help="Do not organize by file type.")
     parser.add_argument("--no-date", action="store_true", help="Do not organize by modification date.")
     parser.add_argument("--dry-run", action="store_true", help="Show actions without moving files.")
+    parser.add_argument("--recursive", "-r", action="store_true",
+                        help="Organize the whole tree below source, moving files in parallel.")
+    parser.add_argument("--workers", type=int, default=MOVE_WORKERS,
+                        help=f"Move threads for --recursive (default: {MOVE_WORKERS}).")
+    parser.add_argument("--verbose", "-v", action="store_true", help="With --recursive, print every move.")
+    parser.add_argument("--journal-dir", help=f"Where move journals are kept (default: DESTINATION/{JOURNAL_DIR}).")
+    parser.add_argument("--dedup", choices=DEDUP_ACTIONS,
+                        help="Handle files whose content is already in the destination: "
+                             "hard-link them, leave them in place, or move them to a quarantine directory.")
+    parser.add_argument("--quarantine-dir", help="Target of --dedup quarantine (default: JOURNAL_DIR/quarantine).")
+    parser.add_argument("--watch", action="store_true",
+                        help="After organizing, keep running and organize new files as they arrive.")
+    parser.add_argument("--poll", action="store_true", help="With --watch, poll instead of using inotify.")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE,
+                        help=f"With --watch, seconds a file must stay unchanged before it is moved when "
+                             f"no close event is seen, e.g. with --poll (default: {WATCH_DEBOUNCE}).")
+    parser.add_argument("--poll-interval", type=float, default=WATCH_POLL_INTERVAL,
+                        help=f"Seconds between polls with --poll (default: {WATCH_POLL_INTERVAL}).")
+    parser.add_argument("--undo", metavar="JOURNAL", help="Move back every file recorded in a journal and exit.")
     return parser.parse_args()
 
 def main():
     args = parse_args()
+    if args.undo:
+        stats = undo_journal(Path(args.undo), args.workers, args.verbose)
+        sys.exit(1 if stats["errors"] else 0)
     src = Path(args.source).resolve()
     dst = Path(args.destination).resolve()
     if not src.is_dir():
         print(f"Error: source '{src}' is not a directory.", file=sys.stderr)
         sys.exit(1)
+    if args.watch and args.dry_run:
+        print("Error: --watch cannot be combined with --dry-run.", file=sys.stderr)
+        sys.exit(1)
     dst.mkdir(parents=True, exist_ok=True)
-    organize(
-        src_dir=src,
-        dst_dir=dst,
-        by_type=not args.no_type,
-        by_date=not args.no_date,
-        dry_run=args.dry_run,
-    )
+    if args.recursive:
+        organize_tree(src, dst, by_type=not args.no_type, by_date=not args.no_date, dry_run=args.dry_run,
+                      workers=args.workers, verbose=args.verbose, journal_dir=args.journal_dir,
+                      dedup=args.dedup, quarantine_dir=args.quarantine_dir, skip_partial=args.watch)
+    else:
+        organize_tree(src, dst, by_type=not args.no_type, by_date=not args.no_date, dry_run=args.dry_run,
+                      workers=1, verbose=True, recursive=False, journal_dir=args.journal_dir,
+                      dedup=args.dedup, quarantine_dir=args.quarantine_dir, skip_partial=args.watch)
+    if args.watch:
+        watch(src, dst, by_type=not args.no_type, by_date=not args.no_date, recursive=args.recursive,
+              debounce=args.debounce, poll=args.poll, poll_interval=args.poll_interval,
+              verbose=args.verbose or not args.recursive, journal_dir=args.journal_dir)
 
 if __name__ == "__main__":
     main()
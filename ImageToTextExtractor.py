@@ -1,10 +1,18 @@
 	import sys
 import os
+import argparse
+import glob
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 try:
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import Image, ImageChops, ImageDraw, ImageFont
 except ImportError:
     raise ImportError("Pillow is required. Install with 'pip install pillow'.")
 
@@ -13,15 +21,256 @@ try:
 except ImportError:
     raise ImportError("pytesseract is required. Install with 'pip install pytesseract'.")
 
+try:
+    # Optional: drives the Tesseract library in-process instead of spawning
+    # the tesseract binary for every image
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".gif", ".webp", ".pnm"}
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ImageToTextExtractor", "ocr_cache.sqlite3")
+DEFAULT_CACHE_MB = 256
+# The 64-bit dHash is indexed as 4 bands of 16 bits: two hashes within
+# Hamming distance 3 always share a band, larger distances scan the table
+PHASH_BANDS = 4
+# A dHash cannot tell screens of different text apart, so a near match is
+# only accepted if a grayscale thumbnail this large (long side) has no
+# pixel differing by more than VERIFY_PIXEL_DELTA levels
+VERIFY_SIZE = 640
+VERIFY_PIXEL_DELTA = 48
+CACHE_SCHEMA = 1
+# Read size when hashing image files for the cache key
+HASH_CHUNK = 1 << 20
+
+# Per-process tesserocr API and OCRCache, created by _init_batch_worker
+_tess_api = None
+_cache = None
+
+
+def preprocess(img: "Image.Image") -> "Image.Image":
+    """Decode fully and convert to 8-bit grayscale, which is what Tesseract binarizes from."""
+    if img.mode != "L":
+        img = img.convert("L")
+    return img
+
+
+def _ocr_image(img: "Image.Image", lang: Optional[str] = None) -> str:
+    if _tess_api is not None:
+        _tess_api.SetImage(img)
+        return _tess_api.GetUTF8Text().strip()
+    # pytesseract may require tesseract binary in PATH; let it raise if unavailable
+    return pytesseract.image_to_string(img, lang=lang).strip()
+
+
+def dhash(img: "Image.Image") -> int:
+    """64-bit difference hash: brightness gradients of a 9x8 thumbnail."""
+    pixels = img.convert("L").resize((9, 8), Image.BILINEAR).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def verify_thumbnail(img: "Image.Image") -> bytes:
+    """Grayscale pixels of the image scaled to fit VERIFY_SIZE, for near-match verification."""
+    img = img.convert("L")
+    scale = min(1.0, VERIFY_SIZE / max(img.size))
+    if scale < 1.0:
+        img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.BOX)
+    return img.tobytes()
+
+
+def _thumbnails_match(a: bytes, b: bytes) -> bool:
+    if a == b:
+        return True
+    if len(a) != len(b):
+        return False
+    # Only per-pixel differences matter, so compare as single-row images
+    size = (len(a), 1)
+    difference = ImageChops.difference(Image.frombytes("L", size, a), Image.frombytes("L", size, b))
+    return difference.getextrema()[1] <= VERIFY_PIXEL_DELTA
+
+
+def _file_digest(path: str) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def _signed64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class OCRCache:
+    """Persistent OCR results in SQLite, keyed by the SHA-256 of the image file.
+
+    With ``phash_distance`` set, an image of the same size whose dHash is
+    within that Hamming distance of a cached image, and whose verification
+    thumbnail matches pixel for pixel within VERIFY_PIXEL_DELTA, also hits.
+    That catches re-encoded copies of a screenshot. Near matches are never
+    stored under the new file's digest. Entries are evicted least recently
+    used first once the stored data exceeds ``max_bytes``. Several
+    processes can share one cache file.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_CACHE_MB << 20,
+                 phash_distance: Optional[int] = None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.phash_distance = phash_distance
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < CACHE_SCHEMA:
+            # Earlier caches stored near-match texts under exact digests
+            self.conn.execute("DROP TABLE IF EXISTS entries")
+            self.conn.execute(f"PRAGMA user_version = {CACHE_SCHEMA}")
+        bands = ", ".join(f"b{i} INTEGER" for i in range(PHASH_BANDS))
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS entries (digest BLOB, lang TEXT, dhash INTEGER, {bands}, "
+                          "width INTEGER, height INTEGER, thumb BLOB, "
+                          "text TEXT, ocr_ms REAL, size INTEGER, last_used REAL, hits INTEGER DEFAULT 0, "
+                          "PRIMARY KEY (digest, lang))")
+        for i in range(PHASH_BANDS):
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS entries_b{i} ON entries (b{i})")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self.conn.commit()
+        self._added = 0
+        self.counts = {"exact": 0, "perceptual": 0, "miss": 0, "saved_ms": 0.0}
+
+    def get(self, digest: bytes, lang: Optional[str]) -> Optional[tuple]:
+        """Exact lookup; returns (text, ocr_ms) or None."""
+        row = self.conn.execute("SELECT text, ocr_ms FROM entries WHERE digest = ? AND lang = ?",
+                                (digest, lang or "")).fetchone()
+        if row is not None:
+            self._touch(digest, lang)
+        return row
+
+    def get_similar(self, image_hash: int, image_size: tuple, thumb: bytes,
+                    lang: Optional[str]) -> Optional[tuple]:
+        """Nearest verified cached image within phash_distance; returns (text, ocr_ms, distance) or None."""
+        if self.phash_distance is None:
+            return None
+        query = "SELECT digest, dhash, thumb, text, ocr_ms FROM entries WHERE lang = ? AND width = ? AND height = ?"
+        params = [lang or "", *image_size]
+        if self.phash_distance < PHASH_BANDS:
+            width = 64 // PHASH_BANDS
+            query += " AND (" + " OR ".join(f"b{i} = ?" for i in range(PHASH_BANDS)) + ")"
+            params += [(image_hash >> (i * width)) & ((1 << width) - 1) for i in range(PHASH_BANDS)]
+        candidates = []
+        for digest, other, other_thumb, text, ocr_ms in self.conn.execute(query, params):
+            distance = bin((other & ((1 << 64) - 1)) ^ image_hash).count("1")
+            if distance <= self.phash_distance:
+                candidates.append((distance, digest, other_thumb, text, ocr_ms))
+        for distance, digest, other_thumb, text, ocr_ms in sorted(candidates, key=lambda c: c[0]):
+            if _thumbnails_match(thumb, zlib.decompress(other_thumb)):
+                self._touch(digest, lang)
+                return text, ocr_ms, distance
+        return None
+
+    def put(self, digest: bytes, image_hash: int, image_size: tuple, thumb: bytes, lang: Optional[str],
+            text: str, ocr_ms: float) -> None:
+        width = 64 // PHASH_BANDS
+        bands = [(image_hash >> (i * width)) & ((1 << width) - 1) for i in range(PHASH_BANDS)]
+        thumb = zlib.compress(thumb)
+        size = len(text.encode("utf-8")) + len(thumb) + 100  # Row overhead, roughly
+        with self.conn:
+            self.conn.execute(f"INSERT OR REPLACE INTO entries VALUES (?, ?, ?, {', '.join('?' * PHASH_BANDS)}, "
+                              "?, ?, ?, ?, ?, ?, ?, 0)",
+                              (digest, lang or "", _signed64(image_hash), *bands, *image_size, thumb,
+                               text, ocr_ms, size, time.time()))
+        self._added += size
+        if self._added > self.max_bytes // 20:
+            self.evict()
+
+    def _touch(self, digest: bytes, lang: Optional[str]) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE entries SET last_used = ?, hits = hits + 1 WHERE digest = ? AND lang = ?",
+                              (time.time(), digest, lang or ""))
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache is under 90% of max_bytes."""
+        self._added = 0
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        excess = total - int(self.max_bytes * 0.9)
+        victims = []
+        for rowid, size in self.conn.execute("SELECT rowid, size FROM entries ORDER BY last_used"):
+            victims.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        with self.conn:
+            self.conn.executemany("DELETE FROM entries WHERE rowid = ?", victims)
+        return len(victims)
 
-def extract_text(image_path: str) -> str:
+    def record(self, kind: str, saved_ms: float = 0.0) -> None:
+        self.counts[kind] += 1
+        self.counts["saved_ms"] += saved_ms
+
+    def stats(self, counts: Optional[dict] = None) -> dict:
+        """Hit ratio and OCR time saved, for this run (or ``counts``) and over the cache's lifetime."""
+        counts = counts or self.counts
+        lookups = counts["exact"] + counts["perceptual"] + counts["miss"]
+        entries, size, hits, saved = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0), "
+            "COALESCE(SUM(hits * ocr_ms), 0) FROM entries").fetchone()
+        return {**counts, "hit_ratio": (lookups - counts["miss"]) / lookups if lookups else 0.0,
+                "entries": entries, "bytes": size, "lifetime_hits": hits, "lifetime_saved_ms": saved}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _print_cache_stats(stats: dict) -> None:
+    print(f"Cache: {stats['exact']} exact + {stats['perceptual']} perceptual hits, {stats['miss']} misses "
+          f"(hit ratio {stats['hit_ratio']:.1%}), saved {stats['saved_ms'] / 1000:.1f}s of OCR; "
+          f"{stats['entries']} entries, {stats['bytes'] / 1e6:.1f} MB, "
+          f"{stats['lifetime_saved_ms'] / 1000:.1f}s saved in total", file=sys.stderr)
+
+
+def _extract(image_path: str, lang: Optional[str] = None, cache: Optional[OCRCache] = None) -> dict:
+    """OCR one image, consulting ``cache`` first; returns the text with timings and cache outcome."""
+    start = time.perf_counter()
+    if cache is None:
+        with Image.open(image_path) as img:
+            img = preprocess(img)
+        decoded = time.perf_counter()
+        text = _ocr_image(img, lang)
+        return {"text": text, "decode_ms": (decoded - start) * 1000,
+                "ocr_ms": (time.perf_counter() - decoded) * 1000}
+    digest = _file_digest(image_path)
+    hit = cache.get(digest, lang)
+    if hit is not None:
+        cache.record("exact", hit[1])
+        return {"text": hit[0], "decode_ms": 0.0, "ocr_ms": 0.0, "cache": "exact", "saved_ms": hit[1]}
+    with Image.open(image_path) as img:
+        img = preprocess(img)
+    image_hash = dhash(img)
+    thumb = verify_thumbnail(img)
+    decoded = time.perf_counter()
+    hit = cache.get_similar(image_hash, img.size, thumb, lang)
+    if hit is not None:
+        cache.record("perceptual", hit[1])
+        return {"text": hit[0], "decode_ms": (decoded - start) * 1000, "ocr_ms": 0.0,
+                "cache": "perceptual", "distance": hit[2], "saved_ms": hit[1]}
+    text = _ocr_image(img, lang)
+    ocr_ms = (time.perf_counter() - decoded) * 1000
+    cache.put(digest, image_hash, img.size, thumb, lang, text, ocr_ms)
+    cache.record("miss")
+    return {"text": text, "decode_ms": (decoded - start) * 1000, "ocr_ms": ocr_ms, "cache": "miss"}
+
+
+def extract_text(image_path: str, lang: Optional[str] = None, cache: Optional[OCRCache] = None) -> str:
     """Run OCR on the given image and return extracted text."""
     if not Path(image_path).is_file():
         raise FileNotFoundError(f"Image file not found: {image_path}")
-    img = Image.open(image_path)
-    # pytesseract may require tesseract binary in PATH; let it raise if unavailable
-    text = pytesseract.image_to_string(img)
-    return text.strip()
+    return _extract(image_path, lang, cache)["text"]
 
 
 def generate_commit_message(extracted_text: str) -> str:
@@ -40,6 +289,126 @@ def generate_commit_message(extracted_text: str) -> str:
     return "Update: (empty OCR result)"
 
 
+def iter_image_paths(inputs: Iterable[str]) -> Iterator[str]:
+    """Yield absolute paths of images named by files, directories (recursively) or glob patterns."""
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = (os.path.join(root, name)
+                          for root, _, names in os.walk(item) for name in sorted(names))
+        elif glob.has_magic(item):
+            candidates = sorted(glob.iglob(item, recursive=True))
+        else:
+            candidates = [item]
+        for path in candidates:
+            path = os.path.abspath(path)
+            if path in seen or not os.path.isfile(path):
+                continue
+            if os.path.splitext(path)[1].lower() in IMAGE_SUFFIXES or path == os.path.abspath(item):
+                seen.add(path)
+                yield path
+
+
+def completed_paths(output: str) -> set:
+    """Paths with a successful result in an existing JSON lines output file."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn last line of an interrupted run
+            if "text" in record:
+                done.add(record["path"])
+    return done
+
+
+def _init_batch_worker(lang: Optional[str], cache_args: Optional[tuple] = None) -> None:
+    global _tess_api, _cache
+    # One OCR per process: stop Tesseract's OpenMP threads from oversubscribing the cores
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    if tesserocr is not None:
+        _tess_api = tesserocr.PyTessBaseAPI(lang=lang or "eng")
+    if cache_args is not None:
+        _cache = OCRCache(*cache_args)
+
+
+def _ocr_path(path: str, lang: Optional[str]) -> dict:
+    """Process pool task: decode, preprocess and OCR one image, through the worker's cache if any."""
+    try:
+        result = _extract(path, lang, _cache)
+    except Exception as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+    for key in ("decode_ms", "ocr_ms", "saved_ms"):
+        if key in result:
+            result[key] = round(result[key], 2)
+    text = result.pop("text")
+    return {"path": path, "text": text, "commit_message": generate_commit_message(text), **result}
+
+
+def batch_extract(inputs: Iterable[str], output: str, jobs: Optional[int] = None,
+                  lang: Optional[str] = None, progress_every: float = 5.0,
+                  cache: Optional[OCRCache] = None) -> dict:
+    """OCR every image named by ``inputs`` on a process pool, appending JSON lines to ``output``.
+
+    Paths that already have a result in ``output`` are skipped, so an
+    interrupted run picks up where it stopped; failed images are retried.
+    At most two images per worker are in flight. With ``cache``, every
+    worker opens the same cache file, and hits skip OCR. Returns counters,
+    including throughput in images per second.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    done = completed_paths(output)
+    stats = {"images": 0, "skipped": 0, "errors": 0}
+    counts = {"exact": 0, "perceptual": 0, "miss": 0, "saved_ms": 0.0}
+    cache_args = (cache.path, cache.max_bytes, cache.phash_distance) if cache is not None else None
+    start = last_report = time.perf_counter()
+
+    def report():
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        stats["seconds"] = elapsed
+        stats["images_per_second"] = stats["images"] / elapsed
+        print(f"OCR {stats['images']} images ({stats['errors']} errors, {stats['skipped']} skipped), "
+              f"{stats['images_per_second']:.1f} images/s", file=sys.stderr)
+
+    with open(output, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(jobs, initializer=_init_batch_worker, initargs=(lang, cache_args)) as pool:
+
+        def handle(result: dict) -> None:
+            nonlocal last_report
+            stats["images"] += 1
+            if "error" in result:
+                stats["errors"] += 1
+                print(f"Error: {result['path']}: {result['error']}", file=sys.stderr)
+            elif "cache" in result:
+                counts[result["cache"]] += 1
+                counts["saved_ms"] += result.get("saved_ms", 0.0)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            if time.perf_counter() - last_report >= progress_every:
+                out.flush()
+                last_report = time.perf_counter()
+                report()
+
+        pending = []
+        for path in iter_image_paths(inputs):
+            if path in done:
+                stats["skipped"] += 1
+                continue
+            pending.append(pool.submit(_ocr_path, path, lang))
+            if len(pending) >= 2 * jobs:
+                handle(pending.pop(0).result())
+        for future in pending:
+            handle(future.result())
+    report()
+    if cache is not None:
+        cache.evict()
+        stats["cache"] = cache.stats(counts)
+        _print_cache_stats(stats["cache"])
+    return stats
+
+
 def create_sample_image(path: str, text: str = "Fixed bug in login flow") -> None:
     """Generate a minimal PNG with the provided text for demo purposes."""
     # Create a white image
@@ -51,7 +420,9 @@ def create_sample_image(path: str, text: str = "Fixed bug in login flow") -> Non
     except Exception:
         font = ImageFont.load_default()
     # Center the text
-    text_width, text_height = d.textsize(text, font=font)
+    # textsize() was removed in Pillow 10; textbbox() exists since Pillow 8
+    left, top, right, bottom = d.textbbox((0, 0), text, font=font)
+    text_width, text_height = right - left, bottom - top
     x = (img.width - text_width) / 2
     y = (img.height - text_height) / 2
     d.text((x, y), text, fill='black', font=font)
@@ -59,29 +430,67 @@ def create_sample_image(path: str, text: str = "Fixed bug in login flow") -> Non
     print(f"Sample image created at {path}")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extract text from images and suggest commit messages.")
+    parser.add_argument("images", nargs="*", help="Image file; with --batch, files, directories or glob patterns.")
+    parser.add_argument("--batch", action="store_true", help="OCR many images on a process pool.")
+    parser.add_argument("--output", "-o", default="ocr_results.jsonl",
+                        help="JSON lines output of --batch; existing results are skipped (default: ocr_results.jsonl).")
+    parser.add_argument("--jobs", "-j", type=int, help="Worker processes for --batch (default: CPU count).")
+    parser.add_argument("--lang", help="Tesseract language(s), e.g. 'eng+deu'.")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, metavar="PATH",
+                        help=f"Reuse OCR results of identical images (default path: {DEFAULT_CACHE_PATH}).")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_MB,
+                        help=f"Cache size in MB before least recently used entries are evicted "
+                             f"(default: {DEFAULT_CACHE_MB}).")
+    parser.add_argument("--phash-distance", type=int, metavar="BITS",
+                        help="With --cache, also reuse results of same-size images whose dHash differs in at "
+                             "most BITS of 64 bits (3 or less is indexed) and whose thumbnails match. A near "
+                             "match can still reuse the wrong text when screens differ in tiny details; leave "
+                             "this off when every character matters.")
+    parser.add_argument("--cache-stats", action="store_true", help="Print cache statistics and exit.")
+    return parser.parse_args()
+
+
 def main() -> None:
     """Entry point: extract text from an image and produce a commit message.
     Usage: python ImageToTextExtractor.py <image_path>
+           python ImageToTextExtractor.py --batch <dir|glob|file>... [-o results.jsonl]
     If no argument is supplied, a sample image is generated and used.
     """
-    if len(sys.argv) > 1:
-        image_path = sys.argv[1]
+    args = parse_args()
+    cache = None
+    if args.cache or args.cache_stats:
+        cache = OCRCache(args.cache or DEFAULT_CACHE_PATH, args.cache_size << 20, args.phash_distance)
+    if args.cache_stats:
+        _print_cache_stats(cache.stats())
+        return
+    if args.batch:
+        if not args.images:
+            print("Error: --batch needs at least one file, directory or glob pattern.")
+            sys.exit(1)
+        stats = batch_extract(args.images, args.output, args.jobs, args.lang, cache=cache)
+        sys.exit(1 if stats["errors"] else 0)
+    if args.images:
+        image_path = args.images[0]
     else:
         # Create and use a sample image in the current directory
         image_path = "sample_image.png"
         if not Path(image_path).exists():
             create_sample_image(image_path)
     try:
-        text = extract_text(image_path)
+        text = extract_text(image_path, args.lang, cache)
         print("--- OCR Extracted Text ---")
         print(text if text else "[No text detected]")
         commit_msg = generate_commit_message(text)
         print("--- Generated Commit Message ---")
         print(commit_msg)
+        if cache is not None:
+            cache.evict()
+            _print_cache_stats(cache.stats())
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
     main()
-}
\ No newline at end of file
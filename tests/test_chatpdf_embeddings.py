@@ -0,0 +1,87 @@
+"""EmbeddingPipeline against the local stub /embeddings endpoint of ChatPDF."""
+
+import os
+import sys
+import types
+import unittest
+from pathlib import Path
+
+import openai
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(name: str) -> types.ModuleType:
+    """Import a top-level script; the scripts start with a stray indent, so compile a dedented copy."""
+    path = ROOT / f"{name}.py"
+    source = path.read_text(encoding="utf-8")
+    module = types.ModuleType(name)
+    module.__file__ = str(path)
+    sys.modules[name] = module
+    exec(compile(source.lstrip("\t"), str(path), "exec"), module.__dict__)
+    return module
+
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+chatpdf = load_script("ChatPDF")
+
+
+class EmbeddingPipelineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = chatpdf.start_stub_server()
+        cls.saved_api_base = openai.api_base
+        openai.api_base = f"http://127.0.0.1:{cls.server.server_port}/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        openai.api_base = cls.saved_api_base
+
+    def setUp(self):
+        handler = chatpdf._StubEmbeddingHandler
+        handler.failures.clear()
+        handler.batch_sizes.clear()
+        handler.delay = 0.0
+
+    def pipeline(self, **options):
+        options.setdefault("backoff", 0.001)
+        return chatpdf.EmbeddingPipeline(model="stub", **options)
+
+    def test_vectors_follow_input_order(self):
+        texts = [f"chunk {i}" for i in range(53)]
+        chatpdf._StubEmbeddingHandler.delay = 0.01
+        vectors = self.pipeline(concurrency=4, max_items=5).embed(texts)
+        self.assertEqual(vectors, [chatpdf.stub_embedding(text) for text in texts])
+
+    def test_batches_respect_item_and_token_limits(self):
+        texts = [f"chunk {i}" for i in range(23)]
+        pipeline = self.pipeline(concurrency=3, max_items=5)
+        pipeline.embed(texts)
+        self.assertEqual(sorted(chatpdf._StubEmbeddingHandler.batch_sizes), [3, 5, 5, 5, 5])
+        self.assertEqual(pipeline.stats["requests"], 5)
+
+        chatpdf._StubEmbeddingHandler.batch_sizes.clear()
+        long_texts = ["word " * 200] * 6
+        budget = 2 * chatpdf.estimate_tokens(long_texts[0])
+        self.pipeline(max_tokens=budget, max_items=100).embed(long_texts)
+        self.assertEqual(chatpdf._StubEmbeddingHandler.batch_sizes, [2, 2, 2])
+
+    def test_retries_rate_limits_and_server_errors(self):
+        chatpdf._StubEmbeddingHandler.failures.extend([429, 500, 503])
+        texts = [f"chunk {i}" for i in range(4)]
+        pipeline = self.pipeline(concurrency=1)
+        self.assertEqual(pipeline.embed(texts), [chatpdf.stub_embedding(text) for text in texts])
+        self.assertEqual(pipeline.stats["retries"], 3)
+        self.assertEqual(pipeline.stats["requests"], 1)
+
+    def test_gives_up_after_max_retries(self):
+        chatpdf._StubEmbeddingHandler.failures.extend([429] * 3)
+        with self.assertRaises(openai.error.RateLimitError):
+            self.pipeline(concurrency=1, max_retries=2).embed(["chunk"])
+
+
+if __name__ == "__main__":
+    unittest.main()
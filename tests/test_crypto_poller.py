@@ -0,0 +1,71 @@
+"""AsyncPricePoller and CryptoAlert.run_async against the local mock price server of CryptoAlert."""
+
+import asyncio
+import importlib.util
+import sys
+import types
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(name: str) -> types.ModuleType:
+    """Import a top-level script; the scripts start with a stray indent, so compile a dedented copy."""
+    path = ROOT / f"{name}.py"
+    source = path.read_text(encoding="utf-8")
+    module = types.ModuleType(name)
+    module.__file__ = str(path)
+    sys.modules[name] = module
+    exec(compile(source.lstrip("\t"), str(path), "exec"), module.__dict__)
+    return module
+
+
+HAVE_AIOHTTP = importlib.util.find_spec("aiohttp") is not None
+crypto = load_script("CryptoAlert") if HAVE_AIOHTTP else None
+
+
+@unittest.skipUnless(HAVE_AIOHTTP, "aiohttp is required")
+class PollerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.runner, self.url, self.counters = await crypto.start_mock_price_server(latency=0.01)
+        self.addAsyncCleanup(self.runner.cleanup)
+
+    async def test_every_batch_is_queued_separately(self):
+        coins = [f"coin-{i}" for i in range(1000)]
+        source = crypto.PriceSource("mock", coins, self.url, interval=60)
+        self.assertGreater(len(source.batches), 1)
+        queue: asyncio.Queue = asyncio.Queue()
+        poller = asyncio.create_task(crypto.AsyncPricePoller([source], queue).run())
+        try:
+            parts = [await asyncio.wait_for(queue.get(), 5) for _ in source.batches]
+        finally:
+            poller.cancel()
+            await asyncio.gather(poller, return_exceptions=True)
+        self.assertEqual(sorted(coin for part in parts for coin in part), sorted(coins))
+        self.assertEqual(self.counters["requests"], len(source.batches))
+
+    async def test_run_async_polls_coins_added_while_running(self):
+        alert = crypto.CryptoAlert({"bitcoin": {"upper": 1e9}})
+        source = crypto.PriceSource("mock", lambda: list(alert.watchlist), self.url, interval=0.05)
+        task = asyncio.create_task(alert.run_async([source]))
+        try:
+            for _ in range(100):
+                await asyncio.sleep(0.02)
+                if "bitcoin" in alert.last_prices:
+                    break
+            alert.add_alert("dogecoin", 1e9, "upper")
+            for _ in range(100):
+                await asyncio.sleep(0.02)
+                if "dogecoin" in alert.last_prices:
+                    break
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.assertIn("bitcoin", alert.last_prices)
+        self.assertIn("dogecoin", alert.last_prices)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Smoke run of ImageToTextExtractor.batch_extract, including resume and the OCR cache."""
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(name: str) -> types.ModuleType:
+    """Import a top-level script; the scripts start with a stray indent, so compile a dedented copy."""
+    path = ROOT / f"{name}.py"
+    source = path.read_text(encoding="utf-8")
+    module = types.ModuleType(name)
+    module.__file__ = str(path)
+    sys.modules[name] = module
+    exec(compile(source.lstrip("\t"), str(path), "exec"), module.__dict__)
+    return module
+
+
+HAVE_DEPS = all(importlib.util.find_spec(name) for name in ("PIL", "pytesseract"))
+extractor = load_script("ImageToTextExtractor") if HAVE_DEPS else None
+
+
+def fake_ocr(img, lang=None):
+    """Stands in for Tesseract when the binary is missing: text derived from the pixels."""
+    return "Fixed " + hashlib.sha256(img.tobytes()).hexdigest()[:8]
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@unittest.skipUnless(HAVE_DEPS, "Pillow and pytesseract are required")
+class BatchExtractTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Workers are forked, so they inherit the replacement
+        cls.saved_ocr = extractor._ocr_image
+        if shutil.which("tesseract") is None:
+            extractor._ocr_image = fake_ocr
+
+    @classmethod
+    def tearDownClass(cls):
+        extractor._ocr_image = cls.saved_ocr
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.images = os.path.join(self.tmp, "images")
+        os.makedirs(self.images)
+        for i in range(6):
+            extractor.create_sample_image(os.path.join(self.images, f"shot{i}.png"), f"Fixed bug number {i}")
+        self.output = os.path.join(self.tmp, "results.jsonl")
+
+    def test_batch_and_resume(self):
+        broken = os.path.join(self.images, "broken.png")
+        Path(broken).write_bytes(b"not an image")
+        stats = extractor.batch_extract([self.images], self.output, jobs=2, progress_every=3600)
+        self.assertEqual((stats["images"], stats["errors"], stats["skipped"]), (7, 1, 0))
+        results = read_results(self.output)
+        self.assertEqual(sum("text" in r for r in results), 6)
+        self.assertTrue(all(r["commit_message"].startswith("Update: ") for r in results if "text" in r))
+
+        # Resume: finished images are skipped, the failed one is tried again
+        os.remove(broken)
+        extractor.create_sample_image(broken, "Fixed the broken one")
+        stats = extractor.batch_extract([self.images], self.output, jobs=2, progress_every=3600)
+        self.assertEqual((stats["images"], stats["errors"], stats["skipped"]), (1, 0, 6))
+        self.assertEqual(len(extractor.completed_paths(self.output)), 7)
+
+    def test_cache_hits_on_second_run(self):
+        cache_path = os.path.join(self.tmp, "cache.sqlite3")
+        cache = extractor.OCRCache(cache_path)
+        first = extractor.batch_extract([self.images], self.output, jobs=2, progress_every=3600, cache=cache)
+        self.assertEqual(first["cache"]["miss"], 6)
+        second_output = os.path.join(self.tmp, "again.jsonl")
+        second = extractor.batch_extract([self.images], second_output, jobs=2, progress_every=3600, cache=cache)
+        self.assertEqual(second["cache"]["exact"], 6)
+        cache.close()
+        texts = lambda path: sorted((r["path"], r["text"]) for r in read_results(path))
+        self.assertEqual(texts(self.output), texts(second_output))
+
+
+if __name__ == "__main__":
+    unittest.main()